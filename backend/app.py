@@ -1,204 +1,555 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from contextlib import contextmanager
+from functools import wraps
+import json
+import logging
+import os
 import threading
 import time
-import random
-from math import radians, cos, sin, asin, sqrt
+import uuid
+
+import numpy as np
+
+from commands import COMMANDS, CommandError, prepare
+from deconfliction import Deconfliction
+from event_scheduler import EventScheduler
+from fleet import Fleet, STATES, FLIGHT_MODES, STATUS_FIELDS, TickEvents
+from flight_log import FlightRecorder
+from geofence import Geofence, GeofenceIndex
+import logs
+from metrics import Registry
+from sim_clock import SimClock
+from telemetry_history import TelemetryHistory, downsample_lttb, downsample_minmax
+from telemetry_stream import telemetry_events
 
 app = Flask(__name__)
 CORS(app)
-
-# Initial drone state with telemetry
-status = {
-    "armed": False,
-    "altitude": 0,
-    "mission": [],
-    "current_wp_index": None,
-    "state": "disarmed",
-    "battery": 100,
-    "gps_locked": True,
-    "flight_mode": "MANUAL"
-}
-
-# Helper: Haversine distance in KM
-def is_within_radius(lat1, lng1, lat2, lng2, radius_km):
-    dlat = radians(lat2 - lat1)
-    dlng = radians(lat2 - lng2)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    return (6371 * c) <= radius_km
+# Serve /api/drones/0/* directly instead of redirecting to the plain /api/* route
+app.url_map.redirect_defaults = False
+
+# Structured JSON logs, level from LOG_LEVEL; per-tick lines are DEBUG
+logs.configure()
+log = logs.get_logger("sim")
+
+# Served at /api/metrics in the Prometheus text format
+metrics = Registry()
+TICK_DURATION = metrics.histogram("gcs_tick_duration_seconds", "Wall-clock time to simulate one tick")
+TICK_LAG = metrics.histogram("gcs_tick_lag_seconds", "How late scheduled ticks started")
+TICK_OVERRUNS = metrics.counter("gcs_tick_overruns_total", "Ticks that took longer than the tick interval")
+REQUESTS = metrics.counter("gcs_http_requests_total", "HTTP requests", ("route", "method", "status"))
+REQUEST_DURATION = metrics.histogram("gcs_http_request_duration_seconds", "HTTP request handling time", ("route", "method"))
+COMMAND_RESULTS = metrics.counter("gcs_commands_total", "Commands by result", ("command", "result"))
+TRANSITIONS = metrics.counter("gcs_transitions_total", "Automatic state transitions", ("event",))
+FAILURE_INJECTIONS = metrics.counter("gcs_failure_injections_total", "Accepted failure injections", ("mode",))
+SIM_TICKS = metrics.gauge("gcs_sim_ticks", "Ticks simulated since start")
+FLEET_DRONES = metrics.gauge("gcs_drones", "Drones in each state", ("state",))
+SEPARATION_LOSSES = metrics.gauge("gcs_separation_losses", "Drone pairs closer than the separation minima")
+
+# Mission geofence: waypoints must lie within MAX_RADIUS_KM of the base point
+app.config.update(
+    BASE_LAT=float(os.environ.get("GCS_BASE_LAT", 51.0447)),  # Calgary
+    BASE_LNG=float(os.environ.get("GCS_BASE_LNG", -114.0719)),
+    MAX_RADIUS_KM=float(os.environ.get("GCS_MAX_RADIUS_KM", 2)),
+    # Largest fleet POST /api/fleet may resize to; every drone costs ~60 bytes of columns
+    MAX_FLEET_SIZE=int(os.environ.get("GCS_MAX_FLEET_SIZE", 1_000_000)),
+)
+
+# Separation minima checked between airborne drones every tick, and between
+# mission legs on upload if GCS_MISSION_DECONFLICTION=1 (missions have no
+# altitudes or times, so the upload check is horizontal only and strict)
+deconfliction = Deconfliction(
+    horizontal_m=float(os.environ.get("GCS_SEPARATION_HORIZONTAL_M", 50)),
+    vertical_m=float(os.environ.get("GCS_SEPARATION_VERTICAL_M", 30)),
+    check_missions=os.environ.get("GCS_MISSION_DECONFLICTION", "0") == "1",
+)
+
+# Drone state with telemetry, one entry per drone in each array.
+# Drone 0 is the drone served by the original single-drone routes.
+fleet = Fleet(
+    1,
+    home=(app.config["BASE_LAT"], app.config["BASE_LNG"]),
+    mission_radius_km=app.config["MAX_RADIUS_KM"],
+    deconfliction=deconfliction,
+)
+
+# Polygon inclusion/exclusion zones checked against flying drones every tick
+geofences = GeofenceIndex()
+
+# Steps only the drones with a transition due on each tick and coasts the rest.
+# Drones are kept synced between ticks; anything that changes a drone's future
+# (commands, rollbacks, geofence edits) must reschedule it, and a resize
+# replaces the scheduler.
+scheduler = EventScheduler(fleet, geofences)
+NO_EVENTS = TickEvents(*(np.zeros(0, dtype=np.int64) for _ in TickEvents._fields))
+
+# Simulation clock, e.g. SIM_CLOCK_MODE=manual for stepped tests
+clock = SimClock(
+    mode=os.environ.get("SIM_CLOCK_MODE", "realtime"),
+    tick_period=float(os.environ.get("SIM_TICK_PERIOD", 5)),
+    speed=float(os.environ.get("SIM_SPEED", 1)),
+)
+# Serializes ticks and commands so scripted steps never interleave with a tick
+sim_lock = threading.RLock()
+
+# Immutable copy of the fleet republished after every write. Request threads
+# read it without locking, so they never see a half-applied tick or command.
+snapshot = fleet.snapshot()
+
+# Drone pairs that lost separation on the last tick, replaced (never mutated) each tick
+separation = deconfliction.drone_conflicts(fleet)
+
+# Called with each new snapshot inside the writer, e.g. to mirror it into shared memory
+snapshot_listeners = []
+
+# fleet.last_version when the snapshot was taken; any write to the fleet moves it on
+published_version = fleet.last_version
+
+def publish(advance_clock=False):
+    """Replace the snapshot and hand it to the listeners.
+
+    With ``advance_clock`` the clock ticks in between, so stream readers woken
+    by the tick already see the new snapshot and listeners see the new tick.
+    """
+    global snapshot, published_version
+    snapshot = fleet.snapshot(snapshot)
+    published_version = fleet.last_version
+    if advance_clock:
+        clock.advance()
+    for listener in snapshot_listeners:
+        listener(snapshot)
+
+@contextmanager
+def fleet_writer():
+    """Single writer section: mutate ``fleet`` inside, the new snapshot is published on exit.
+
+    Nothing is published if the fleet did not change since the last snapshot.
+    """
+    with sim_lock:
+        try:
+            yield fleet
+        finally:
+            if fleet.last_version != published_version:
+                publish()
+
+# Per-tick telemetry of the first HISTORY_DRONES drones, default 24 h at 5 s ticks
+history = TelemetryHistory(
+    capacity=int(os.environ.get("HISTORY_CAPACITY", 17280)),
+    drones=int(os.environ.get("HISTORY_DRONES", 16)),
+)
+
+# Binary log of every command and transition, replayable with flight_log.py
+flight_log = None
+if os.environ.get("FLIGHT_LOG_PATH"):
+    flight_log = FlightRecorder(os.environ["FLIGHT_LOG_PATH"], clock.tick_period, fleet.home)
+    flight_log.start(clock.ticks, fleet)
+
+# Encoded /api/status bodies keyed by (drone, fields), reused while the drone version is unchanged.
+# ETags embed a per-process id so versions from a previous run never match.
+STATUS_CACHE_SIZE = 4096
+status_cache = {}
+BOOT_ID = uuid.uuid4().hex[:8]
 
 # === Background Thread for Real-Time Simulation ===
+def run_tick():
+    started = time.perf_counter()
+    with fleet_writer():
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("tick", extra={"fields": {"tick": clock.ticks, "drones": fleet.size, "states": fleet.counts()}})
+
+        events = step_fleet()
+        check_separation()
+        publish(advance_clock=True)
+        history.record(clock.sim_time, fleet)
+        if flight_log is not None:
+            flight_log.tick(clock.ticks, fleet, events)
+
+        for name, drones in zip(events._fields, events):
+            if len(drones):
+                TRANSITIONS.labels(name).add(len(drones))
+                log.info(name, extra={"fields": {"tick": clock.ticks, "count": len(drones), "drones": drones[:10].tolist()}})
+
+    duration = time.perf_counter() - started
+    TICK_DURATION.observe(duration)
+    SIM_TICKS.set(clock.ticks)
+    if clock.mode != "manual" and duration > clock.interval:
+        TICK_OVERRUNS.inc()
+        log.warning("tick_overrun", extra={"fields": {"tick": clock.ticks, "duration": duration, "interval": clock.interval}})
+
+def step_fleet():
+    """Advance every drone by one tick through the scheduler; returns the tick's transitions."""
+    due = []
+    scheduler.advance_to(scheduler.tick + 1, lambda tick, events: due.append(events))
+    scheduler.sync()
+    return due[0] if due else NO_EVENTS
+
+def check_separation():
+    """Find drone pairs closer than the separation minima and log the ones that just lost it."""
+    global separation
+    previous = {tuple(pair) for pair in separation.drones.tolist()}
+    separation = deconfliction.drone_conflicts(fleet)
+    SEPARATION_LOSSES.set(len(separation.drones))
+    new = [pair for pair in separation.drones.tolist() if tuple(pair) not in previous]
+    if new:
+        log.warning("separation_loss", extra={"fields": {"tick": clock.ticks + 1, "count": len(new), "pairs": new[:10]}})
+
 def telemetry_loop():
     while True:
-        time.sleep(5)
-
-        print(f"[LOOP] Battery={status['battery']} | Alt={status['altitude']} | State={status['state']} | Armed={status['armed']}")
-
-        if status["state"] == "disarmed":
-            continue
-
-        status["battery"] = max(status["battery"] - 1, 0)
-
-        if status["state"] == "flying":
-            status["altitude"] = min(status["altitude"] + 2, 120)
-        elif status["state"] == "landing":
-            status["altitude"] = max(status["altitude"] - 5, 0)
-
-        if status["battery"] <= 5 and status["state"] == "flying":
-            print("[AUTO] Critical battery, initiating FAILSAFE")
-            status["state"] = "landing"
-            status["flight_mode"] = "FAILSAFE"
-            status["current_wp_index"] = None
-
-        if status["state"] == "flying" and status["mission"]:
-            idx = status.get("current_wp_index")
-            if idx is not None and idx < len(status["mission"]) - 1:
-                status["current_wp_index"] += 1
-            elif idx == len(status["mission"]) - 1:
-                print("[AUTO] Final waypoint reached — landing")
-                status["state"] = "landing"
-                status["flight_mode"] = "MANUAL"
-                status["current_wp_index"] = None
-
-        # ✅ Final disarm logic
-        if status["altitude"] == 0 and status["state"] != "disarmed":
-            print("[AUTO] Altitude = 0 → Disarming")
-            status["state"] = "disarmed"
-            status["armed"] = False
-            status["flight_mode"] = "MANUAL"
-            status["current_wp_index"] = None
+        TICK_LAG.observe(clock.wait_for_tick())
+        run_tick()
 
 # Start background telemetry thread
 threading.Thread(target=telemetry_loop, daemon=True).start()
 
 # === API Endpoints ===
 
-@app.route('/api/arm', methods=['POST'])
-def arm():
-    if status["battery"] < 10:
-        return jsonify({"message": "Battery too low to arm"}), 400
-    if status["state"] != "disarmed":
-        return jsonify({"message": "Cannot arm from current state"}), 400
-
-    status["armed"] = True
-    status["state"] = "armed"
-    status["battery"] = max(status["battery"] - 1, 0)
-    return jsonify({"message": "Drone armed"})
-
-@app.route('/api/takeoff', methods=['POST'])
-def takeoff():
-    if status["battery"] < 20:
-        return jsonify({"message": "Battery too low to take off"}), 400
-    if not status["gps_locked"]:
-        return jsonify({"message": "Cannot take off: GPS signal lost"}), 400
-    if status["state"] != "armed":
-        return jsonify({"message": "Drone must be armed before takeoff"}), 400
-
-    status["altitude"] = 10
-    status["state"] = "flying"
-    status["flight_mode"] = "AUTO"
-    status["battery"] = max(status["battery"] - 5, 0)
-
-    if status["mission"]:
-        status["current_wp_index"] = 0
-
-    return jsonify({"message": "Drone took off to 10m"})
-
-@app.route('/api/land', methods=['POST'])
-def land():
-    if status["state"] != "flying":
-        return jsonify({"message": "Drone must be flying to land"}), 400
-
-    status["state"] = "landing"
-    status["flight_mode"] = "MANUAL"
-    status["battery"] = max(status["battery"] - 2, 0)
-    return jsonify({"message": "Landing sequence started"})
-
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    return jsonify(status)
-
-@app.route('/api/mission', methods=['POST'])
-def upload_mission():
-    if not status["gps_locked"]:
-        return jsonify({"message": "Cannot upload mission: GPS lock required"}), 400
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUESTS.labels(route, request.method, response.status_code).add(1)
+    started = g.get("request_started")
+    if started is not None:
+        REQUEST_DURATION.labels(route, request.method).add(time.perf_counter() - started)
+    return response
+
+def drone_route(rule, **options):
+    """Register ``/api<rule>`` for drone 0 and ``/api/drones/<id><rule>`` for any drone."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(drone_id=0):
+            if drone_id >= snapshot.size:
+                return jsonify({"message": f"Unknown drone {drone_id}"}), 404
+            return view(drone_id)
+
+        app.add_url_rule(f"/api{rule}", view_func=wrapper, defaults={"drone_id": 0}, **options)
+        app.add_url_rule(f"/api/drones/<int:drone_id>{rule}", view_func=wrapper, **options)
+        return wrapper
+    return decorator
+
+def execute_command(name, drone_id, params, command=None):
+    """Run one command; returns ``(payload, status, flight log records, ran)``. Call inside ``fleet_writer``.
+
+    ``command`` replaces ``COMMANDS[name]``, e.g. with one from
+    ``commands.prepare``. ``ran`` is False when the command or drone is
+    unknown. Metrics are left to the caller, which knows whether the change
+    is kept.
+    """
+    if not isinstance(name, str) or name not in COMMANDS:
+        return {"message": f"Unknown command {name}"}, 400, None, False
+    if not isinstance(drone_id, int) or isinstance(drone_id, bool) or not 0 <= drone_id < fleet.size:
+        return {"message": f"Unknown drone {drone_id}"}, 404, None, False
+
+    try:
+        payload = (command or COMMANDS[name])(fleet, drone_id, params)
+        status = 200
+    except CommandError as e:
+        payload = {"message": str(e)}
+        status = e.status
+    scheduler.reschedule(drone_id)
+
+    records = None
+    if flight_log is not None:
+        records = flight_log.command_records(clock.ticks, name, drone_id, fleet, status == 200, params)
+    return payload, status, records, True
+
+def count_command(name, params, status, committed=True):
+    """Count a command that ran; accepted commands of a rolled-back batch count as rolled back."""
+    result = "rejected" if status != 200 else "ok" if committed else "rolled_back"
+    COMMAND_RESULTS.labels(name, result).add(1)
+    if result == "ok" and name == "inject_failure":
+        FAILURE_INJECTIONS.labels(params["mode"]).add(1)
+
+def run_command(name, drone_id):
+    """Execute a command from ``commands.COMMANDS`` with the request body as parameters.
+
+    Its slow, read-only part (e.g. optimizing a mission) runs against the
+    snapshot before the writer lock is taken, so ticks and other commands
+    are not held up by it.
+    """
+    params = request.get_json(silent=True) or {}
+    view = snapshot
+    command = prepare(name, view, drone_id, params) if drone_id < view.size else None
+    with fleet_writer():
+        payload, status, records, ran = execute_command(name, drone_id, params, command)
+        if records is not None:
+            flight_log.write(records)
+    if ran:
+        count_command(name, params, status)
+    return jsonify(payload), status
+
+@drone_route('/arm', methods=['POST'])
+def arm(drone_id):
+    return run_command("arm", drone_id)
+
+@drone_route('/takeoff', methods=['POST'])
+def takeoff(drone_id):
+    return run_command("takeoff", drone_id)
+
+@drone_route('/land', methods=['POST'])
+def land(drone_id):
+    return run_command("land", drone_id)
+
+def encode_status(view, drone_id, fields):
+    """Return ``(etag, body)`` for a drone, reusing the cached encoding of its current version."""
+    version = int(view.version[drone_id])
+    key = (drone_id, fields)
+    cached = status_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    data = view.to_dict(drone_id)
+    if fields:
+        data = {name: data[name] for name in fields}
+    body = json.dumps(data, separators=(",", ":")).encode()
+    etag = f"{BOOT_ID}-{drone_id}-{version}" + "".join(f"+{name}" for name in fields)
+
+    if len(status_cache) >= STATUS_CACHE_SIZE:
+        status_cache.clear()
+    status_cache[key] = (version, etag, body)
+    return etag, body
+
+@drone_route('/status', methods=['GET'])
+def get_status(drone_id):
+    fields = tuple(name for name in request.args.get("fields", "").split(",") if name)
+    unknown = [name for name in fields if name not in STATUS_FIELDS]
+    if unknown:
+        return jsonify({"message": f"Unknown status fields: {', '.join(unknown)}"}), 400
+
+    etag, body = encode_status(snapshot, drone_id, fields)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+@drone_route('/stream', methods=['GET'])
+def stream_status(drone_id):
+    """Server-sent telemetry: a snapshot on connect, then per-tick deltas of changed fields."""
+    def read_drone(known_version):
+        view = snapshot
+        if drone_id >= view.size:
+            return None
+        version = int(view.version[drone_id])
+        return version, None if version == known_version else view.to_dict(drone_id)
+
+    return Response(
+        stream_with_context(telemetry_events(read_drone, clock.wait_past, clock.ticks)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@drone_route('/telemetry/history', methods=['GET'])
+def get_history(drone_id):
+    """Recorded telemetry between sim times ``from`` and ``to``, downsampled server-side."""
+    if drone_id >= history.drones:
+        return jsonify({"message": f"No history kept for drone {drone_id}"}), 404
+
+    try:
+        start = request.args.get("from", type=float)
+        end = request.args.get("to", type=float)
+        max_points = int(request.args.get("max_points", 1000))
+    except ValueError:
+        return jsonify({"message": "Invalid history query"}), 400
+    method = request.args.get("method", "lttb")
+    field = request.args.get("field", "altitude")
+    if max_points < 3:
+        return jsonify({"message": "max_points must be at least 3"}), 400
+    if method not in ("lttb", "minmax"):
+        return jsonify({"message": f"Invalid downsampling method: {method}"}), 400
+    if field not in ("altitude", "battery"):
+        return jsonify({"message": f"Cannot downsample by {field}"}), 400
+
+    timestamps, records = history.query(drone_id, start, end)
+    if method == "lttb":
+        keep = downsample_lttb(timestamps, records[field], max_points)
+    else:
+        keep = downsample_minmax(records[field], max_points)
+    timestamps, records = timestamps[keep], records[keep]
+
+    wp = records["current_wp_index"].tolist()
+    return jsonify({
+        "samples": len(history),
+        "returned": len(keep),
+        "timestamps": timestamps.tolist(),
+        "altitude": records["altitude"].tolist(),
+        "battery": records["battery"].tolist(),
+        "state": [STATES[code] for code in records["state"]],
+        "flight_mode": [FLIGHT_MODES[code] for code in records["flight_mode"]],
+        "current_wp_index": [None if i < 0 else i for i in wp],
+        "gps_locked": records["gps_locked"].tolist(),
+    })
 
-    data = request.json
-    raw_waypoints = data.get("waypoints", [])
-
-    base_lat, base_lng = 51.0447, -114.0719  # Calgary
-    MAX_RADIUS_KM = 2
-
-    generated = []
-    for wp in raw_waypoints:
-        for _ in range(10):
-            offset_lat = random.uniform(-0.01, 0.01)
-            offset_lng = random.uniform(-0.01, 0.01)
-            new_lat = base_lat + offset_lat
-            new_lng = base_lng + offset_lng
-            if is_within_radius(base_lat, base_lng, new_lat, new_lng, MAX_RADIUS_KM):
-                generated.append({
-                    "name": wp,
-                    "lat": round(new_lat, 6),
-                    "lng": round(new_lng, 6)
-                })
+@drone_route('/mission', methods=['POST'])
+def upload_mission(drone_id):
+    return run_command("mission", drone_id)
+
+@drone_route('/inject_failure', methods=['POST'])
+def inject_failure(drone_id):
+    return run_command("inject_failure", drone_id)
+
+@drone_route('/clear_mission', methods=['POST'])
+def clear_mission(drone_id):
+    return run_command("clear_mission", drone_id)
+
+@drone_route('/reset', methods=['POST'])
+def reset(drone_id):
+    return run_command("reset", drone_id)
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """Run an ordered list of commands under one lock.
+
+    Each entry is ``{"command": name, "drone_id": id, ...params}``. With
+    ``atomic`` (the default) the batch stops at the first failing command and
+    every change is rolled back; otherwise successful commands are kept and
+    ``stop_on_error`` decides whether to carry on after a failure.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get("commands")
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return jsonify({"message": "Batch needs a list of command objects"}), 400
+    atomic = data.get("atomic", True)
+    stop_on_error = atomic or data.get("stop_on_error", False)
+
+    results = []
+    log_records = []
+    executed = []  # (name, params, status) of the commands that ran, counted once the batch is settled
+    with fleet_writer():
+        checkpoint = fleet.checkpoint() if atomic else None
+        for entry in entries:
+            params = {k: v for k, v in entry.items() if k not in ("command", "drone_id")}
+            name, drone_id = entry.get("command"), entry.get("drone_id", 0)
+            payload, status, records, ran = execute_command(name, drone_id, params)
+            results.append({"command": name, "drone_id": drone_id, "status": status, **payload})
+            if records is not None:
+                log_records.append(records)
+            if ran:
+                executed.append((name, params, status))
+            if status != 200 and stop_on_error:
                 break
+
+        ok = all(result["status"] == 200 for result in results)
+        committed = ok or not atomic
+        if committed:
+            if log_records:
+                flight_log.write(np.concatenate(log_records))
         else:
-            return jsonify({"message": f"Failed to assign valid location for {wp}"}), 400
+            fleet.restore(checkpoint)
+            scheduler.reschedule()
+
+    for name, params, status in executed:
+        count_command(name, params, status, committed)
+    for entry in entries[len(results):]:
+        results.append({"command": entry.get("command"), "drone_id": entry.get("drone_id", 0), "status": None, "message": "Skipped"})
 
-    status["mission"] = generated
-    return jsonify({"message": "Mission uploaded", "mission": status["mission"]})
+    return jsonify({"ok": ok, "committed": committed, "results": results}), 200 if ok else 400
 
-@app.route('/api/inject_failure', methods=['POST'])
-def inject_failure():
+@app.route('/api/fleet', methods=['GET'])
+def get_fleet():
+    view = snapshot
+    return jsonify({"size": view.size, "states": view.counts()})
+
+@app.route('/api/fleet', methods=['POST'])
+def resize_fleet():
+    data = request.json
+    size = data.get("size")
+    if not isinstance(size, int) or size < 1:
+        return jsonify({"message": "Fleet size must be a positive integer"}), 400
+    if size > app.config["MAX_FLEET_SIZE"]:
+        return jsonify({"message": f"Fleet size must be at most {app.config['MAX_FLEET_SIZE']}"}), 400
+
+    global scheduler
+    with fleet_writer():
+        fleet.resize(size)
+        scheduler = EventScheduler(fleet, geofences)
+        if flight_log is not None:
+            flight_log.resize(clock.ticks, size)
+    return jsonify({"message": f"Fleet resized to {size} drones", "size": size})
+
+@app.route('/api/geofences', methods=['GET'])
+def list_geofences():
+    return jsonify({"geofences": geofences.to_list()})
+
+@app.route('/api/geofences', methods=['POST'])
+def upload_geofence():
     data = request.json
-    mode = data.get("mode")
-
-    if mode == "gps_loss":
-        status["gps_locked"] = False
-        return jsonify({"message": "Simulated GPS loss"})
-
-    elif mode == "low_battery":
-        status["battery"] = 4
-        return jsonify({"message": "Simulated critical battery"})
-
-    elif mode == "motor_fail":
-        if status["state"] == "flying":
-            status["flight_mode"] = "FAILSAFE"
-            status["state"] = "landing"
-            return jsonify({"message": "Simulated motor failure — drone landing"})
-        return jsonify({"message": "Motor failure only affects flying drones"}), 400
-
-    elif mode == "reset":
-        status.update({
-            "gps_locked": True,
-            "battery": 100,
-            "flight_mode": "MANUAL"
-        })
-        return jsonify({"message": "System reset to normal"})
-
-    return jsonify({"message": "Invalid failure mode"}), 400
-
-@app.route('/api/clear_mission', methods=['POST'])
-def clear_mission():
-    status["mission"] = []
-    status["current_wp_index"] = None
-    return jsonify({"message": "Mission cleared"})
-
-@app.route('/api/reset', methods=['POST'])
-def reset():
-    status.update({
-        "armed": False,
-        "altitude": 0,
-        "mission": [],
-        "current_wp_index": None,
-        "state": "disarmed",
-        "battery": 100,
-        "gps_locked": True,
-        "flight_mode": "MANUAL"
+    name = data.get("name")
+    if not isinstance(name, str) or not name:
+        return jsonify({"message": "Geofence name is required"}), 400
+
+    points = data.get("points", [])
+    if points and isinstance(points[0], dict):
+        points = [[p.get("lat"), p.get("lng")] for p in points]
+    try:
+        zone = Geofence(name, data.get("kind", "exclusion"), points)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    with sim_lock:
+        geofences.add(zone)
+        scheduler.reschedule()
+    return jsonify({"message": f"Geofence {name} uploaded", "geofence": zone.to_dict()})
+
+@app.route('/api/geofences/<name>', methods=['DELETE'])
+def delete_geofence(name):
+    with sim_lock:
+        removed = geofences.remove(name)
+        scheduler.reschedule()
+    if not removed:
+        return jsonify({"message": f"Unknown geofence {name}"}), 404
+    return jsonify({"message": f"Geofence {name} removed"})
+
+@app.route('/api/conflicts', methods=['GET'])
+def get_conflicts():
+    """Drone pairs within the separation minima as of the last tick."""
+    losses = separation
+    return jsonify({
+        "separation": deconfliction.to_dict(),
+        "complete": losses.complete,
+        "conflicts": [
+            {"drones": pair, "horizontal_m": round(h, 2), "vertical_m": v}
+            for pair, h, v in zip(losses.drones.tolist(), losses.horizontal_m.tolist(), losses.vertical_m.tolist())
+        ],
     })
-    return jsonify({"message": "Drone reset to default state"})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    view = snapshot
+    for state, count in view.counts().items():
+        FLEET_DRONES.set(count, state)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/sim/clock', methods=['GET'])
+def get_clock():
+    return jsonify(clock.to_dict())
+
+@app.route('/api/sim/clock', methods=['POST'])
+def configure_clock():
+    data = request.json
+    try:
+        clock.configure(data.get("mode"), data.get("tick_period"), data.get("speed"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"message": f"Clock set to {clock.mode}", "clock": clock.to_dict()})
+
+@app.route('/api/sim/step', methods=['POST'])
+def step_clock():
+    if clock.mode != "manual":
+        return jsonify({"message": "Clock must be in manual mode to step"}), 400
+
+    data = request.get_json(silent=True) or {}
+    ticks = data.get("ticks", 1)
+    if not isinstance(ticks, int) or ticks < 1:
+        return jsonify({"message": "Ticks must be a positive integer"}), 400
+
+    for _ in range(ticks):
+        run_tick()
+    return jsonify({"message": f"Stepped {ticks} ticks", "clock": clock.to_dict()})
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # The reloader would import this module in a second process, running a
+    # second simulation (and flight recorder) alongside the served one
+    app.run(debug=True, use_reloader=False)
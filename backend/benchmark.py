@@ -0,0 +1,357 @@
+"""Benchmarks of the simulation API and tick loop.
+
+Measures /api/status throughput and latency in-process (Flask test client)
+and over HTTP from concurrent client processes, mission upload time against waypoint
+count, server tick time against drone count, the event scheduler against fixed
+ticks on a mostly idle fleet and single-drone command time against fleet size
+(every write publishes a new snapshot). Results are written as JSON; with
+``--baseline`` the run is compared against an earlier result file and exits
+non-zero on regressions beyond ``--tolerance``.
+
+Usage: python benchmark.py [--out FILE] [--quick] [--baseline FILE] [--tolerance 0.25]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+
+import numpy as np
+
+# The benchmarks drive the clock themselves; set before app is imported
+os.environ.setdefault("SIM_CLOCK_MODE", "manual")
+
+import app as sim_app
+from commands import COMMANDS
+from event_scheduler import EventScheduler
+from fleet import Fleet, FLYING, AUTO
+
+HOME = (51.0447, -114.0719)
+
+FULL = {
+    "status_requests": 20000,
+    "status_drones": 1000,
+    "http_clients": 8,
+    "http_requests": 20000,
+    "mission_waypoints": (10, 100, 1000, 10000, 50000),
+    "mission_repeats": 5,
+    "tick_drones": (1, 100, 1000, 10000, 100000),
+    "ticks": 200,
+    "scheduler_drones": (1000, 10000, 100000),
+    "command_drones": (1000, 100000, 1000000),
+    "command_repeats": 50,
+}
+QUICK = {
+    "status_requests": 500,
+    "status_drones": 10,
+    "http_clients": 4,
+    "http_requests": 200,
+    "mission_waypoints": (10, 100),
+    "mission_repeats": 2,
+    "tick_drones": (1, 100),
+    "ticks": 20,
+    "scheduler_drones": (100,),
+    "command_drones": (100,),
+    "command_repeats": 10,
+}
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) of per-request ``latencies`` (s)."""
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(ms),
+        "rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+    }
+
+
+def prepare_fleet(client, drones):
+    """Resize the app fleet and put every other drone in the air."""
+    client.post("/api/fleet", json={"size": drones})
+    for i in range(drones):
+        client.post(f"/api/drones/{i}/reset")
+    for i in range(0, drones, 2):
+        client.post(f"/api/drones/{i}/arm")
+        client.post(f"/api/drones/{i}/takeoff")
+
+
+def bench_status_inprocess(requests, drones):
+    client = sim_app.app.test_client()
+    prepare_fleet(client, drones)
+    client.post("/api/sim/step")
+
+    results = {}
+    for name, conditional in (("full", False), ("not_modified", True)):
+        etags = {i: client.get(f"/api/drones/{i}/status").headers["ETag"] for i in range(drones)}
+        latencies = []
+        started = time.perf_counter()
+        for n in range(requests):
+            i = n % drones
+            headers = {"If-None-Match": etags[i]} if conditional else None
+            t0 = time.perf_counter()
+            client.get(f"/api/drones/{i}/status", headers=headers)
+            latencies.append(time.perf_counter() - t0)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+
+def http_client(port, requests, drones, k, go, results):
+    """One keep-alive client in its own process, so it never competes with the server for the GIL."""
+    latencies, errors = [], 0
+    go.wait()
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    try:
+        for n in range(requests):
+            t0 = time.perf_counter()
+            conn.request("GET", f"/api/drones/{(k + n) % drones}/status")
+            res = conn.getresponse()
+            res.read()
+            latencies.append(time.perf_counter() - t0)
+            errors += res.status != 200
+    finally:
+        conn.close()
+    results.put((latencies, errors))
+
+
+def bench_status_http(clients, requests, drones):
+    """Concurrent keep-alive clients, each in a forked process, against the app served on an ephemeral port."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    prepare_fleet(sim_app.app.test_client(), drones)
+    server = make_server("127.0.0.1", 0, sim_app.app, threaded=True, request_handler=QuietHandler)
+
+    # Fork before the server thread starts, the clients only need its port
+    ctx = multiprocessing.get_context("fork")
+    go, queue = ctx.Event(), ctx.Queue()
+    workers = [
+        ctx.Process(target=http_client, args=(server.server_port, requests // clients, drones, k, go, queue))
+        for k in range(clients)
+    ]
+    for worker in workers:
+        worker.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    started = time.perf_counter()
+    go.set()
+    results = [queue.get() for _ in workers]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+    server.shutdown()
+
+    result = summarize([t for latencies, _ in results for t in latencies], elapsed)
+    result.update(clients=clients, errors=sum(errors for _, errors in results))
+    return result
+
+
+def bench_upload_mission(waypoint_counts, repeats):
+    client = sim_app.app.test_client()
+    client.post("/api/drones/0/reset")
+    results = []
+    for count in waypoint_counts:
+        body = {"waypoints": [f"WP{i + 1}" for i in range(count)], "seed": 1}
+        client.post("/api/drones/0/mission", json=body)  # warm-up
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            res = client.post("/api/drones/0/mission", json=body)
+            times.append(time.perf_counter() - t0)
+            assert res.status_code == 200, res.get_json()
+        results.append({"waypoints": count, "ms": round(float(np.median(times)) * 1000, 4)})
+    client.post("/api/drones/0/clear_mission")
+    return results
+
+
+def relaunch(fleet):
+    """Put every drone back at the start of its mission, in the air with a full battery."""
+    with sim_app.fleet_writer():
+        fleet.state[:], fleet.flight_mode[:] = FLYING, AUTO
+        fleet.armed[:], fleet.battery[:] = True, 100
+        fleet.altitude[:], fleet.current_wp_index[:] = 10, 0
+        fleet.touch(slice(None))
+        sim_app.scheduler.reschedule()
+
+
+def bench_tick(drone_counts, ticks):
+    """Server tick time (``run_tick``) of app fleets where every drone flies a 10-waypoint mission.
+
+    Missions are spread over about 100 km so separation checks see a
+    realistic density rather than every drone in one square kilometre.
+    """
+    client = sim_app.app.test_client()
+    fleet = sim_app.fleet
+    results = []
+    rng = np.random.default_rng(0)
+    for drones in drone_counts:
+        client.post("/api/fleet", json={"size": drones})
+        home_lat, home_lng = fleet.home
+        with sim_app.fleet_writer():
+            for i in range(drones):
+                offsets = rng.uniform(-0.5, 0.5, (2, 10))
+                fleet.set_mission(i, [{}] * 10, home_lat + offsets[0], home_lng + offsets[1])
+        times = []
+        for t in range(ticks):
+            if t % 5 == 0:
+                # Relaunch so the fleet keeps flying instead of landing
+                relaunch(fleet)
+            t0 = time.perf_counter()
+            sim_app.run_tick()
+            times.append(time.perf_counter() - t0)
+        ms = np.asarray(times) * 1000
+        results.append({
+            "drones": drones,
+            "p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        })
+    return results
+
+
+def bench_scheduler(drone_counts, ticks):
+    """Time to simulate ``ticks`` ticks of a fleet where one drone in ten flies a long mission."""
+    results = []
+    for drones in drone_counts:
+        fleets = []
+        for _ in range(2):
+            fleet = Fleet(drones, home=HOME)
+            for i in range(0, drones, 10):
+                fleet.set_mission(i, [{}] * 200, np.full(200, HOME[0]), np.full(200, HOME[1]))
+                COMMANDS["arm"](fleet, i)
+                COMMANDS["takeoff"](fleet, i)
+            fleets.append(fleet)
+
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            fleets[0].tick()
+        fixed = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scheduler = EventScheduler(fleets[1])
+        scheduler.advance_to(ticks)
+        scheduler.sync()
+        scheduled = time.perf_counter() - t0
+        results.append({
+            "drones": drones,
+            "fixed_ms": round(fixed * 1000, 4),
+            "scheduler_ms": round(scheduled * 1000, 4),
+        })
+    return results
+
+
+def bench_command(drone_counts, repeats):
+    """Time of a one-drone command, including the snapshot it publishes, against fleet size."""
+    client = sim_app.app.test_client()
+    results = []
+    for drones in drone_counts:
+        client.post("/api/fleet", json={"size": drones})
+        client.post("/api/drones/0/reset")
+        times = []
+        for n in range(repeats):
+            t0 = time.perf_counter()
+            res = client.post("/api/drones/0/" + ("reset" if n % 2 else "arm"))
+            times.append(time.perf_counter() - t0)
+            assert res.status_code == 200, res.get_json()
+        ms = np.asarray(times) * 1000
+        results.append({
+            "drones": drones,
+            "p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        })
+    client.post("/api/drones/0/reset")
+    return results
+
+
+def run_benchmarks(quick=False):
+    config = QUICK if quick else FULL
+    original_size = sim_app.snapshot.size
+    try:
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "quick": quick,
+            },
+            "status_inprocess": bench_status_inprocess(config["status_requests"], config["status_drones"]),
+            "status_http": bench_status_http(config["http_clients"], config["http_requests"], config["status_drones"]),
+            "upload_mission": bench_upload_mission(config["mission_waypoints"], config["mission_repeats"]),
+            "tick": bench_tick(config["tick_drones"], config["ticks"]),
+            "scheduler": bench_scheduler(config["scheduler_drones"], config["ticks"]),
+            "command": bench_command(config["command_drones"], config["command_repeats"]),
+        }
+    finally:
+        client = sim_app.app.test_client()
+        client.post("/api/fleet", json={"size": original_size})
+        for i in range(original_size):
+            client.post(f"/api/drones/{i}/reset")
+    return results
+
+
+def flatten(results, prefix=""):
+    """``{"a.b.c": value}`` of the numeric leaves, list entries keyed by their first field."""
+    flat = {}
+    items = results.items() if isinstance(results, dict) else []
+    for key, value in items:
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            for entry in value:
+                label, *_ = entry.values()
+                flat.update(flatten(entry, f"{name}[{label}]."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that got worse than ``baseline`` by more than ``tolerance`` (a fraction)."""
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, old in previous.items():
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        if name.endswith("_ms") or name.endswith(".ms"):
+            worse = new > old * (1 + tolerance)
+        elif name.endswith("rps"):
+            worse = new < old * (1 - tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append({"metric": name, "baseline": old, "current": new})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation API and tick loop")
+    parser.add_argument("--out", help="write results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="small sizes, for smoke testing")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.quick)
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if results.get("regressions") else 0)
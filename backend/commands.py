@@ -0,0 +1,286 @@
+from collections import namedtuple
+
+import numpy as np
+
+from deconfliction import changed_drones
+from fleet import (
+    DISARMED, ARMED, FLYING, LANDING, AUTO, MANUAL, FAILSAFE, NO_WAYPOINT,
+    CLIMB_RATE, DESCENT_RATE, MAX_ALTITUDE,
+)
+from geo import is_within_radius, sample_in_radius
+from route_optimizer import MAX_WAYPOINTS, optimize_route, path_length_km
+
+FAILURE_MODES = ("gps_loss", "low_battery", "motor_fail", "reset")
+
+ARM_BATTERY_COST = 1
+TAKEOFF_BATTERY_COST = 5
+TAKEOFF_ALTITUDE = 10
+FULL_BATTERY = 100
+
+
+class CommandError(Exception):
+    """A command was rejected; the message is returned to the client."""
+
+    status = 400
+
+
+class MissionConflict(CommandError):
+    """A new mission comes too close to missions other drones are flying."""
+
+    status = 409
+
+
+# Each command takes (fleet, drone_id, params) where params is the request
+# JSON body, and returns the response payload or raises CommandError.
+
+def arm(fleet, drone_id, params=None):
+    if fleet.battery[drone_id] < 10:
+        raise CommandError("Battery too low to arm")
+    if fleet.state[drone_id] != DISARMED:
+        raise CommandError("Cannot arm from current state")
+
+    fleet.armed[drone_id] = True
+    fleet.state[drone_id] = ARMED
+    fleet.battery[drone_id] = max(fleet.battery[drone_id] - ARM_BATTERY_COST, 0)
+    fleet.touch(drone_id)
+    return {"message": "Drone armed"}
+
+
+def takeoff(fleet, drone_id, params=None):
+    if fleet.battery[drone_id] < 20:
+        raise CommandError("Battery too low to take off")
+    if not fleet.gps_locked[drone_id]:
+        raise CommandError("Cannot take off: GPS signal lost")
+    if fleet.state[drone_id] != ARMED:
+        raise CommandError("Drone must be armed before takeoff")
+
+    fleet.altitude[drone_id] = TAKEOFF_ALTITUDE
+    fleet.state[drone_id] = FLYING
+    fleet.flight_mode[drone_id] = AUTO
+    fleet.battery[drone_id] = max(fleet.battery[drone_id] - TAKEOFF_BATTERY_COST, 0)
+
+    if fleet.mission_len[drone_id]:
+        fleet.current_wp_index[drone_id] = 0
+
+    fleet.touch(drone_id)
+    return {"message": "Drone took off to 10m"}
+
+
+def land(fleet, drone_id, params=None):
+    if fleet.state[drone_id] != FLYING:
+        raise CommandError("Drone must be flying to land")
+
+    fleet.state[drone_id] = LANDING
+    fleet.flight_mode[drone_id] = MANUAL
+    fleet.battery[drone_id] = max(fleet.battery[drone_id] - 2, 0)
+    fleet.touch(drone_id)
+    return {"message": "Landing sequence started"}
+
+
+def estimate_flight(waypoints):
+    """Simulated ticks and battery use of flying a mission of ``waypoints`` from arming on the ground.
+
+    The simulator reaches one waypoint per tick whatever the distance,
+    climbing meanwhile, then lands; every tick off the ground drains 1%.
+    ``battery_sufficient`` is False when that needs more than a full battery.
+    """
+    if waypoints == 0:
+        return {"estimated_flight_ticks": 0, "estimated_battery_pct": 0, "battery_sufficient": True}
+    altitude = min(TAKEOFF_ALTITUDE + CLIMB_RATE * waypoints, MAX_ALTITUDE)
+    ticks = waypoints + -(-altitude // DESCENT_RATE)
+    battery = ARM_BATTERY_COST + TAKEOFF_BATTERY_COST + ticks
+    return {"estimated_flight_ticks": ticks, "estimated_battery_pct": battery, "battery_sufficient": battery <= FULL_BATTERY}
+
+
+# Waypoints of a validated mission ready to assign, with its route summary
+# and the fleet view it was deconflicted against
+MissionPlan = namedtuple("MissionPlan", ["names", "lat", "lng", "route", "checked"])
+
+
+def plan_mission(view, drone_id, params):
+    """Validate, generate and optionally optimize a mission without changing anything.
+
+    ``view`` is the fleet or a snapshot of it; it is only read, so this can
+    run outside the lock serializing fleet writes. Missions crossing the
+    remaining legs of other drones' missions in ``view`` are rejected when
+    the fleet has a ``deconfliction`` configured.
+    """
+    raw_waypoints = params.get("waypoints", [])
+    seed = params.get("seed")
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        raise CommandError("Seed must be a non-negative integer")
+    optimize = params.get("optimize", False)
+    if not isinstance(optimize, bool):
+        raise CommandError("optimize must be true or false")
+    time_budget = params.get("time_budget", 1.0)
+    if isinstance(time_budget, bool) or not isinstance(time_budget, (int, float)) or not 0 < time_budget <= 10:
+        raise CommandError("time_budget must be a number of seconds in (0, 10]")
+    if optimize and len(raw_waypoints) > MAX_WAYPOINTS:
+        raise CommandError(f"Route optimization supports at most {MAX_WAYPOINTS} waypoints")
+
+    names = []
+    lat = np.full(len(raw_waypoints), np.nan)
+    lng = np.full(len(raw_waypoints), np.nan)
+    for i, wp in enumerate(raw_waypoints):
+        if not isinstance(wp, dict):
+            names.append(wp)
+            continue
+        names.append(wp.get("name", f"WP{i + 1}"))
+        if "lat" in wp or "lng" in wp:
+            try:
+                lat[i], lng[i] = float(wp["lat"]), float(wp["lng"])
+            except (KeyError, TypeError, ValueError):
+                raise CommandError(f"Invalid coordinates for {names[i]}")
+
+    base_lat, base_lng = view.home
+    radius_km = view.mission_radius_km
+
+    given = ~np.isnan(lat)
+    outside = np.flatnonzero(given)[~is_within_radius(base_lat, base_lng, lat[given], lng[given], radius_km)]
+    if outside.size:
+        listed = ", ".join(str(names[i]) for i in outside[:10])
+        more = f" and {outside.size - 10} more" if outside.size > 10 else ""
+        raise CommandError(f"Waypoints outside {radius_km:g} km geofence: {listed}{more}")
+
+    missing = ~given
+    if missing.any():
+        rng = np.random.default_rng(seed)
+        lat[missing], lng[missing] = sample_in_radius(int(missing.sum()), base_lat, base_lng, radius_km, rng)
+
+    lat, lng = np.round(lat, 6), np.round(lng, 6)
+    start = (float(view.lat[drone_id]), float(view.lng[drone_id]))
+    if np.isnan(start).any():
+        start = None
+    route = {"optimized": optimize, "length_km": path_length_km(lat, lng, start)}
+    if optimize:
+        order = optimize_route(lat, lng, start, time_budget)
+        names, lat, lng = [names[k] for k in order], lat[order], lng[order]
+        route["original_length_km"] = route["length_km"]
+        route["length_km"] = path_length_km(lat, lng, start)
+    route.update(estimate_flight(len(names)))
+
+    check_conflicts(view, drone_id, lat, lng)
+    return MissionPlan(names, lat, lng, route, view)
+
+
+def check_conflicts(view, drone_id, lat, lng, drones=None):
+    """Raise ``MissionConflict`` if the mission comes too close to those of (some of) the other drones."""
+    if view.deconfliction is None:
+        return
+    conflicts = view.deconfliction.mission_conflicts(view, drone_id, lat, lng, drones)
+    if conflicts:
+        listed = ", ".join(str(other) for other in conflicts[:10])
+        more = f" and {len(conflicts) - 10} more" if len(conflicts) > 10 else ""
+        raise MissionConflict(f"Mission conflicts with the missions of drones {listed}{more}")
+
+
+def assign_mission(fleet, drone_id, plan):
+    """Give drone ``drone_id`` the mission of ``plan``, once it passes the checks on the drone's current state.
+
+    The plan was deconflicted against a possibly older view of the fleet, so
+    only the drones that gained legs since are checked again.
+    """
+    if not fleet.gps_locked[drone_id]:
+        raise CommandError("Cannot upload mission: GPS lock required")
+    check_conflicts(fleet, drone_id, plan.lat, plan.lng, changed_drones(plan.checked, fleet))
+
+    generated = [
+        {"name": name, "lat": wp_lat, "lng": wp_lng}
+        for name, wp_lat, wp_lng in zip(plan.names, plan.lat.tolist(), plan.lng.tolist())
+    ]
+
+    fleet.set_mission(drone_id, generated, plan.lat, plan.lng)
+    fleet.touch(drone_id)
+    return {"message": "Mission uploaded", "mission": fleet.missions[drone_id], "route": plan.route}
+
+
+def upload_mission(fleet, drone_id, params):
+    """Assign waypoints inside ``fleet.mission_radius_km`` of the fleet's home point.
+
+    ``params["waypoints"]`` holds names, or objects with a name and optionally
+    fixed lat/lng; waypoints without coordinates are generated from ``seed``.
+    With ``params["optimize"]`` the waypoints are reordered into a short path
+    from the drone's position within ``params["time_budget"]`` seconds.
+    """
+    if not fleet.gps_locked[drone_id]:
+        raise CommandError("Cannot upload mission: GPS lock required")
+    return assign_mission(fleet, drone_id, plan_mission(fleet, drone_id, params))
+
+
+def inject_failure(fleet, drone_id, params):
+    mode = params.get("mode")
+
+    if mode == "gps_loss":
+        fleet.gps_locked[drone_id] = False
+        fleet.touch(drone_id)
+        return {"message": "Simulated GPS loss"}
+
+    elif mode == "low_battery":
+        fleet.battery[drone_id] = 4
+        fleet.touch(drone_id)
+        return {"message": "Simulated critical battery"}
+
+    elif mode == "motor_fail":
+        if fleet.state[drone_id] == FLYING:
+            fleet.flight_mode[drone_id] = FAILSAFE
+            fleet.state[drone_id] = LANDING
+            fleet.touch(drone_id)
+            return {"message": "Simulated motor failure — drone landing"}
+        raise CommandError("Motor failure only affects flying drones")
+
+    elif mode == "reset":
+        fleet.gps_locked[drone_id] = True
+        fleet.battery[drone_id] = 100
+        fleet.flight_mode[drone_id] = MANUAL
+        fleet.touch(drone_id)
+        return {"message": "System reset to normal"}
+
+    raise CommandError("Invalid failure mode")
+
+
+def clear_mission(fleet, drone_id, params=None):
+    fleet.set_mission(drone_id, [])
+    fleet.current_wp_index[drone_id] = NO_WAYPOINT
+    fleet.touch(drone_id)
+    return {"message": "Mission cleared"}
+
+
+def reset(fleet, drone_id, params=None):
+    fleet.reset(drone_id)
+    fleet.touch(drone_id)
+    return {"message": "Drone reset to default state"}
+
+
+COMMANDS = {
+    "arm": arm,
+    "takeoff": takeoff,
+    "land": land,
+    "mission": upload_mission,
+    "inject_failure": inject_failure,
+    "clear_mission": clear_mission,
+    "reset": reset,
+}
+
+
+def prepare(name, view, drone_id, params):
+    """``COMMANDS[name]`` with its slow, read-only part already run against ``view``.
+
+    Callers run this before taking the writer lock and then call the result
+    like any command under it. Only missions have such a part (validation,
+    waypoint generation and route optimization); a plan that failed is
+    raised when the returned command runs.
+    """
+    if name != "mission":
+        return COMMANDS[name]
+    try:
+        plan = plan_mission(view, drone_id, params)
+    except CommandError as error:
+        failure = error  # ``error`` is unbound once the except clause ends
+
+        def rejected(fleet, drone_id, params=None):
+            raise failure
+        return rejected
+
+    def assign(fleet, drone_id, params=None):
+        return assign_mission(fleet, drone_id, plan)
+    return assign
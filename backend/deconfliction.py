@@ -0,0 +1,267 @@
+"""Separation checks between drones and between mission paths.
+
+Positions are projected to local metres and bucketed into a uniform grid
+whose cells are as wide as the search radius, so close pairs are found by
+looking only at the 3x3 block of cells around each point: O(n log n) for the
+sort instead of O(n^2) comparisons. The grid is rebuilt from the current
+positions every time, which in NumPy is a single sort and cheaper than
+moving drones between buckets.
+
+Missions are compared leg by leg, waypoint to waypoint: legs are sampled every
+``horizontal_m`` along their length, close samples name candidate leg pairs
+and those are confirmed with the exact distance between the two segments.
+Missions carry no altitudes or times, so two paths conflict when any of
+their legs come within the horizontal separation. That makes the check
+strict (random missions over a small area nearly always cross), so it is
+off unless ``check_missions`` is set.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from fleet import ARMED, DISARMED, FLYING, NO_WAYPOINT
+from geo import EARTH_RADIUS_KM, haversine_km
+from geofence import cell_key
+
+DEFAULT_HORIZONTAL_M = 50.0
+DEFAULT_VERTICAL_M = 30.0
+MAX_CANDIDATE_PAIRS = 100_000  # per tick, bounds the work when many drones share a spot
+MISSION_CHUNK = 2048  # new mission samples matched at a time, bounds the memory of the join
+
+# Pairs of drones closer than both separation minima, with their distances;
+# ``complete`` is False when too many drones were bunched up to check them all
+SeparationLoss = namedtuple("SeparationLoss", ["drones", "horizontal_m", "vertical_m", "complete"])
+
+
+def project(lat, lng, ref_lat):
+    """Equirectangular ``(x, y)`` metres, accurate over the few km of a mission area."""
+    metres_per_rad = EARTH_RADIUS_KM * 1000
+    x = np.radians(lng) * metres_per_rad * np.cos(np.radians(ref_lat))
+    y = np.radians(lat) * metres_per_rad
+    return x, y
+
+
+class SpatialHash:
+    """Points bucketed into a uniform grid of ``cell`` wide squares.
+
+    A radius query up to ``cell`` only has to look at the 3x3 block of cells
+    around each query point.
+    """
+
+    def __init__(self, x, y, cell):
+        self.x, self.y, self.cell = x, y, cell
+        keys = self._keys(x, y)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def _keys(self, x, y, d_row=0, d_col=0):
+        return cell_key(np.floor(y / self.cell).astype(np.int64) + d_row, np.floor(x / self.cell).astype(np.int64) + d_col)
+
+    def query(self, x, y, radius, limit=None):
+        """``(i, j, complete)``: pairs of query point ``i`` and stored point ``j`` within ``radius``.
+
+        ``limit`` bounds the candidate pairs examined, since points packed
+        into one spot make the pair count quadratic; ``complete`` is False if
+        it was hit.
+        """
+        found_i, found_j = [], []
+        room = limit
+        complete = True
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                keys = self._keys(x, y, d_row, d_col)
+                lo = np.searchsorted(self.keys, keys, side="left")
+                counts = np.searchsorted(self.keys, keys, side="right") - lo
+                if room is not None:
+                    if counts.sum() > room:
+                        counts = np.where(np.cumsum(counts) <= room, counts, 0)
+                        complete = False
+                    room -= counts.sum()
+                i = np.repeat(np.arange(len(x)), counts)
+                first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                j = self.order[first + np.arange(len(i))]
+                close = (x[i] - self.x[j]) ** 2 + (y[i] - self.y[j]) ** 2 <= radius ** 2
+                found_i.append(i[close])
+                found_j.append(j[close])
+        return np.concatenate(found_i), np.concatenate(found_j), complete
+
+
+def _point_segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / np.where(length2 > 0, length2, 1), 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def segment_distance(p, q):
+    """Shortest distance between segments ``p`` and ``q``, each an ``(n, 4)`` array of x1, y1, x2, y2."""
+    p1x, p1y, p2x, p2y = p.T
+    q1x, q1y, q2x, q2y = q.T
+
+    def side(ax, ay, bx, by, cx, cy):
+        return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+    crossing = (
+        (side(p1x, p1y, p2x, p2y, q1x, q1y) * side(p1x, p1y, p2x, p2y, q2x, q2y) < 0)
+        & (side(q1x, q1y, q2x, q2y, p1x, p1y) * side(q1x, q1y, q2x, q2y, p2x, p2y) < 0)
+    )
+    distance = np.minimum.reduce([
+        _point_segment_distance(p1x, p1y, q1x, q1y, q2x, q2y),
+        _point_segment_distance(p2x, p2y, q1x, q1y, q2x, q2y),
+        _point_segment_distance(q1x, q1y, p1x, p1y, p2x, p2y),
+        _point_segment_distance(q2x, q2y, p1x, p1y, p2x, p2y),
+    ])
+    return np.where(crossing, 0, distance)
+
+
+class Deconfliction:
+    """Horizontal and vertical separation minima and the checks enforcing them.
+
+    ``check_missions`` turns on the upload-time comparison of new missions
+    with the remaining legs of armed and flying drones.
+    """
+
+    def __init__(self, horizontal_m=DEFAULT_HORIZONTAL_M, vertical_m=DEFAULT_VERTICAL_M, check_missions=False):
+        if horizontal_m <= 0 or vertical_m < 0:
+            raise ValueError("Horizontal separation must be positive and vertical separation not negative")
+        self.horizontal_m = float(horizontal_m)
+        self.vertical_m = float(vertical_m)
+        self.check_missions = check_missions
+
+    def to_dict(self):
+        return {"horizontal_m": self.horizontal_m, "vertical_m": self.vertical_m, "check_missions": self.check_missions}
+
+    def drone_conflicts(self, view):
+        """Airborne drone pairs ``(i, j)``, ``i < j``, closer than both minima."""
+        airborne = np.flatnonzero((view.state != DISARMED) & (view.altitude > 0) & ~np.isnan(view.lat))
+        if airborne.size < 2:
+            empty = np.zeros(0)
+            return SeparationLoss(np.zeros((0, 2), dtype=np.int64), empty, empty, True)
+
+        lat, lng = view.lat[airborne], view.lng[airborne]
+        x, y = project(lat, lng, lat.mean())
+        i, j, complete = SpatialHash(x, y, self.horizontal_m).query(x, y, self.horizontal_m, MAX_CANDIDATE_PAIRS)
+        i, j = i[i < j], j[i < j]
+
+        # Confirm on the sphere; the grid only shortlists
+        horizontal = haversine_km(lat[i], lng[i], lat[j], lng[j]) * 1000
+        vertical = np.abs(view.altitude[airborne[i]].astype(np.int64) - view.altitude[airborne[j]])
+        close = (horizontal < self.horizontal_m) & (vertical < self.vertical_m)
+        drones = np.stack([airborne[i[close]], airborne[j[close]]], axis=1)
+        order = np.lexsort((drones[:, 1], drones[:, 0]))
+        return SeparationLoss(drones[order], horizontal[close][order], vertical[close][order].astype(np.float64), complete)
+
+    def remaining_legs(self, fleet, exclude=None, drones=None):
+        """``(owner, lat, lng)`` of the mission waypoints still ahead of armed and flying drones.
+
+        ``fleet`` may be a snapshot; ``drones`` limits the owners to those.
+        A flying drone's remaining path starts at the waypoint it last
+        reached, so the leg it is on counts.
+        """
+        if drones is None:
+            drones = np.arange(fleet.size)
+        active = has_remaining_legs(fleet, drones)
+        if exclude is not None:
+            active &= drones != exclude
+        drones = drones[active]
+
+        state, wp, length = fleet.state[drones], fleet.current_wp_index[drones], fleet.mission_len[drones]
+        first = np.where(state == FLYING, np.maximum(wp - 1, 0), 0)
+        counts = (length - first).astype(np.int64)
+        owner = np.repeat(drones, counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        lat, lng = fleet.waypoint_coords(owner, np.repeat(first, counts) + offset)
+        return owner, lat, lng
+
+    def mission_conflicts(self, fleet, drone_id, lat, lng, drones=None):
+        """Sorted ids of other drones whose remaining mission legs come within ``horizontal_m`` of the new mission.
+
+        ``drones`` limits the check to those other drones.
+        """
+        if not self.check_missions or len(lat) == 0:
+            return []
+        owner, other_lat, other_lng = self.remaining_legs(fleet, drone_id, drones)
+        if owner.size == 0:
+            return []
+
+        ref_lat = float(np.mean(lat))
+        new_owner, new_segments = legs(*project(lat, lng, ref_lat), np.zeros(len(lat), dtype=np.int64))
+        other_owner, other_segments = legs(*project(other_lat, other_lng, ref_lat), owner)
+
+        # Samples every ``step`` along both legs: legs within horizontal_m
+        # have samples within horizontal_m + step of each other
+        step = self.horizontal_m
+        radius = self.horizontal_m + step
+        new_leg, new_x, new_y = sample_legs(new_segments, step)
+        other_leg, other_x, other_y = sample_legs(other_segments, step)
+
+        conflicting = np.zeros(fleet.size, dtype=bool)
+        alive = np.arange(len(other_leg))
+        index = SpatialHash(other_x, other_y, radius)
+        for start in range(0, len(new_leg), MISSION_CHUNK):
+            chunk = slice(start, start + MISSION_CHUNK)
+            i, j, _ = index.query(new_x[chunk], new_y[chunk], radius)
+            pairs = np.unique(new_leg[chunk][i] * len(other_segments) + other_leg[alive[j]])
+            a, b = np.divmod(pairs, len(other_segments))
+            a, b = a[~conflicting[other_owner[b]]], b[~conflicting[other_owner[b]]]
+            close = segment_distance(new_segments[a], other_segments[b]) < self.horizontal_m
+            conflicting[other_owner[b[close]]] = True
+
+            # Stop looking at drones already known to conflict once they are most of the index
+            remaining = alive[~conflicting[other_owner[other_leg[alive]]]]
+            if remaining.size == 0:
+                break
+            if remaining.size < alive.size // 2:
+                alive = remaining
+                index = SpatialHash(other_x[alive], other_y[alive], radius)
+        return np.flatnonzero(conflicting).tolist()
+
+
+def has_remaining_legs(view, drones):
+    """Mask of ``drones`` still to fly mission legs: armed with a mission, or flying one."""
+    state, wp, length = view.state[drones], view.current_wp_index[drones], view.mission_len[drones]
+    on_route = (state == FLYING) & (wp != NO_WAYPOINT) & (wp < length)
+    return on_route | ((state == ARMED) & (length > 0))
+
+
+def changed_drones(view, fleet):
+    """Drones of ``fleet`` whose remaining mission may have grown since ``view`` of it was taken.
+
+    Only a new mission or going from no legs left to some (arming, or
+    re-arming after landing) adds legs; flying along them only drops legs,
+    so conflicts found against ``view`` stay valid for the others.
+    """
+    if view is fleet:
+        return np.zeros(0, dtype=np.int64)
+    n = min(view.size, fleet.size)
+    changed = np.ones(fleet.size, dtype=bool)  # drones added since are new
+    changed[:n] = (fleet.mission_version[:n] != view.mission_version[:n]) | (
+        has_remaining_legs(fleet, slice(n)) & ~has_remaining_legs(view, slice(n))
+    )
+    return np.flatnonzero(changed)
+
+
+def legs(x, y, owner):
+    """``(owner, segments)`` of consecutive points of the same owner; a lone point is a zero-length leg."""
+    same = owner[1:] == owner[:-1]
+    starts = np.flatnonzero(same)
+    # Owners with a single point hover there
+    single = np.ones(len(owner), dtype=bool)
+    single[1:] &= ~same
+    single[:-1] &= ~same
+    lone = np.flatnonzero(single)
+    segments = np.concatenate([
+        np.stack([x[starts], y[starts], x[starts + 1], y[starts + 1]], axis=1),
+        np.stack([x[lone], y[lone], x[lone], y[lone]], axis=1),
+    ])
+    return np.concatenate([owner[starts], owner[lone]]), segments
+
+
+def sample_legs(segments, step):
+    """``(leg, x, y)`` of points every ``step`` metres along each leg, ends included."""
+    x1, y1, x2, y2 = segments.T
+    counts = np.ceil(np.hypot(x2 - x1, y2 - y1) / step).astype(np.int64) + 1
+    leg = np.repeat(np.arange(len(segments)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = k / np.maximum(counts[leg] - 1, 1)
+    return leg, x1[leg] + t * (x2[leg] - x1[leg]), y1[leg] + t * (y2[leg] - y1[leg])
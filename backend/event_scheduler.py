@@ -0,0 +1,177 @@
+"""Discrete-event stepping of a ``Fleet``: work follows events, not drones x ticks.
+
+Between two automatic transitions a drone evolves in closed form: battery
+drains one unit per tick, altitude climbs or descends at a constant rate and a
+drone on a mission reaches one waypoint per tick. ``EventScheduler`` computes
+for every drone the tick of its next transition (critical battery failsafe,
+mission complete, touchdown, geofence breach) and keeps them in a priority
+queue. ``advance_to`` pops the due drones, brings them up to the tick before
+with those closed forms and runs ``Fleet.tick`` on just them, so the fleet
+ends up exactly as if it had been ticked as a whole every step (apart from
+``version`` numbers). Drones without a due event are only brought up to date
+by ``sync``, e.g. before they are read or commanded.
+"""
+import heapq
+
+import numpy as np
+
+from fleet import (
+    ARMED, CLIMB_RATE, DESCENT_RATE, DISARMED, FAILSAFE_BATTERY, FLYING, LANDING, MAX_ALTITUDE, NO_WAYPOINT,
+)
+
+# The queue is rebuilt without stale entries once it holds this many per drone
+MAX_STALE_FACTOR = 4
+
+
+class EventScheduler:
+    """Event queue over a fleet of fixed size.
+
+    ``tick`` is the simulated tick the fleet has been advanced to. Commands
+    and geofence changes alter future events, so call ``reschedule`` on the
+    affected drones (after ``sync``-ing them) once they are applied.
+    """
+
+    def __init__(self, fleet, geofences=None):
+        self.fleet = fleet
+        self.geofences = geofences
+        self.tick = 0
+        self._synced = np.zeros(fleet.size, dtype=np.int64)  # tick each drone's columns are up to date with
+        self._generation = np.zeros(fleet.size, dtype=np.int64)  # queue entries of older generations are stale
+        self._queue = []  # (due tick, drone, generation)
+        self._schedule(np.arange(fleet.size))
+
+    def __len__(self):
+        """Number of queued events, including stale ones."""
+        return len(self._queue)
+
+    def advance_to(self, tick, on_events=None):
+        """Process every event due up to ``tick``; ``on_events(due, TickEvents)`` sees each batch."""
+        queue = self._queue
+        while queue and queue[0][0] <= tick:
+            due = queue[0][0]
+            drones = []
+            while queue and queue[0][0] == due:
+                _, drone, generation = heapq.heappop(queue)
+                if generation == self._generation[drone]:
+                    drones.append(drone)
+            if not drones:
+                continue
+            drones = np.array(sorted(drones), dtype=np.int64)
+            self._coast(drones, due - 1)
+            events = self.fleet.tick(self.geofences, drones)
+            self._synced[drones] = due
+            self._schedule(drones)
+            if on_events is not None:
+                on_events(due, events)
+        self.tick = max(self.tick, tick)
+
+    def sync(self, drones=None):
+        """Bring ``drones`` (default: all) up to the current tick."""
+        if drones is None:
+            # Disarmed drones only change through commands, so only the others need coasting
+            self._coast(np.flatnonzero(self.fleet.state != DISARMED), self.tick)
+            self._synced[:] = self.tick
+            return
+        self._coast(self._indices(drones), self.tick)
+
+    def reschedule(self, drones=None):
+        """Sync ``drones`` (default: all) and recompute their next event."""
+        drones = self._indices(drones)
+        self._coast(drones, self.tick)
+        self._schedule(drones)
+
+    def _indices(self, drones):
+        if drones is None:
+            return np.arange(self.fleet.size)
+        return np.atleast_1d(np.asarray(drones, dtype=np.int64))
+
+    def _coast(self, drones, target):
+        """Advance ``drones`` to ``target`` in closed form; none of them may have an event due by then."""
+        fleet = self.fleet
+        steps = target - self._synced[drones]
+        drones, steps = drones[steps > 0], steps[steps > 0]
+        self._synced[drones] = target
+
+        state = fleet.state[drones]
+        active = state != DISARMED
+        drones, steps, state = drones[active], steps[active], state[active]
+        if drones.size == 0:
+            return
+        fleet.touch(drones)
+        fleet.battery[drones] = np.maximum(fleet.battery[drones] - steps, 0)
+
+        altitude = fleet.altitude[drones]
+        fleet.altitude[drones] = np.where(
+            state == FLYING,
+            np.minimum(altitude + CLIMB_RATE * steps, MAX_ALTITUDE),
+            np.where(state == LANDING, altitude - DESCENT_RATE * steps, altitude),
+        )
+
+        # One waypoint per tick, ending at the one reached on the last step
+        wp = fleet.current_wp_index[drones]
+        route = (state == FLYING) & (wp != NO_WAYPOINT) & (wp < fleet.mission_len[drones])
+        drones, steps, wp = drones[route], steps[route], wp[route]
+        fleet.lat[drones], fleet.lng[drones] = fleet.waypoint_coords(drones, wp + steps - 1)
+        fleet.current_wp_index[drones] = wp + steps
+
+    def _schedule(self, drones):
+        """Queue the next event of ``drones``, which must be synced, dropping their older entries."""
+        fleet = self.fleet
+        state = fleet.state[drones]
+        altitude = fleet.altitude[drones].astype(np.int64)
+        steps = np.zeros(len(drones), dtype=np.int64)  # ticks until the next event, 0 for none
+
+        steps[(state == ARMED) & (altitude == 0)] = 1
+        landing = state == LANDING
+        steps[landing] = np.maximum(-(-altitude[landing] // DESCENT_RATE), 1)
+
+        flying = np.flatnonzero(state == FLYING)
+        if flying.size:
+            ids = drones[flying]
+            wp = fleet.current_wp_index[ids].astype(np.int64)
+            length = fleet.mission_len[ids].astype(np.int64)
+            route = (wp != NO_WAYPOINT) & (wp < length)
+            until_failsafe = np.maximum(fleet.battery[ids].astype(np.int64) - FAILSAFE_BATTERY, 1)
+            until_complete = np.where(route, length - wp, until_failsafe)
+            flying_steps = np.minimum(until_failsafe, until_complete)
+            if self.geofences:
+                self._breaches_before(ids, wp, route, flying_steps)
+            steps[flying] = flying_steps
+
+        self._generation[drones] += 1
+        due = self._synced[drones] + steps
+        entries = [
+            (d, int(drone), g)
+            for d, drone, g in zip(due[steps > 0].tolist(), drones[steps > 0].tolist(), self._generation[drones][steps > 0].tolist())
+        ]
+        if len(entries) > len(self._queue) or len(self._queue) > MAX_STALE_FACTOR * self.fleet.size + 1024:
+            # Rebuilding also drops the stale entries that repeated rescheduling piles up
+            generation = self._generation.tolist()
+            self._queue[:] = [entry for entry in self._queue if entry[2] == generation[entry[1]]]
+            self._queue.extend(entries)
+            heapq.heapify(self._queue)
+        else:
+            for entry in entries:
+                heapq.heappush(self._queue, entry)
+
+    def _breaches_before(self, drones, wp, route, steps):
+        """Lower ``steps`` of flying ``drones`` to the first tick they would end inside a breach.
+
+        Hovering drones stay put, so they breach on the next tick or never. A
+        drone on a route ends tick ``j`` at waypoint ``wp + j - 1``; only the
+        ticks before its failsafe or mission completion can breach.
+        """
+        fleet = self.fleet
+        hover = np.flatnonzero(~route)
+        breach = self.geofences.breaches(fleet.lat[drones[hover]], fleet.lng[drones[hover]])
+        steps[hover[breach]] = 1
+
+        moving = np.flatnonzero(route & (steps > 1))
+        horizon = steps[moving] - 1
+        owner = np.repeat(np.arange(len(moving)), horizon)
+        offset = np.arange(len(owner)) - np.repeat(np.cumsum(horizon) - horizon, horizon)
+        lat, lng = fleet.waypoint_coords(drones[moving][owner], wp[moving][owner] + offset)
+        hit = np.flatnonzero(self.geofences.breaches(lat, lng))
+        # Entries are grouped by drone in increasing offset, so the first hit of each drone is its earliest
+        first_owner, first = np.unique(owner[hit], return_index=True)
+        steps[moving[first_owner]] = offset[hit[first]] + 1
@@ -0,0 +1,337 @@
+import numpy as np
+from collections import namedtuple
+
+# State and flight mode codes stored in the fleet arrays
+STATES = ("disarmed", "armed", "flying", "landing")
+DISARMED, ARMED, FLYING, LANDING = range(len(STATES))
+
+FLIGHT_MODES = ("MANUAL", "AUTO", "FAILSAFE")
+MANUAL, AUTO, FAILSAFE = range(len(FLIGHT_MODES))
+
+NO_WAYPOINT = -1  # current_wp_index of None
+MAX_ALTITUDE = 120
+CLIMB_RATE = 2
+DESCENT_RATE = 5
+FAILSAFE_BATTERY = 5
+
+# Per-drone columns and their initial values
+FIELDS = {
+    "armed": (bool, False),
+    "altitude": (np.int32, 0),
+    "battery": (np.int32, 100),
+    "state": (np.int8, DISARMED),
+    "flight_mode": (np.int8, MANUAL),
+    "current_wp_index": (np.int32, NO_WAYPOINT),
+    "gps_locked": (bool, True),
+    "mission_len": (np.int32, 0),
+    "mission_start": (np.int64, 0),
+    "mission_version": (np.int64, 0),  # changes whenever the mission is replaced
+    "lat": (np.float64, np.nan),
+    "lng": (np.float64, np.nan),
+}
+
+# Keys of the per-drone status dict returned by Fleet.to_dict
+STATUS_FIELDS = ("armed", "altitude", "mission", "current_wp_index", "state", "battery", "gps_locked", "flight_mode", "lat", "lng")
+
+# Indices of the drones that hit each automatic transition during a tick
+TickEvents = namedtuple("TickEvents", ["failsafe", "mission_complete", "disarmed", "geofence_breach"])
+
+MIN_POOL_CAPACITY = 1024
+DEFAULT_MISSION_RADIUS_KM = 2
+
+
+class FleetView:
+    """Read accessors shared by ``Fleet`` and its immutable ``FleetSnapshot``."""
+
+    def counts(self):
+        """Number of drones in each state."""
+        totals = np.bincount(self.state, minlength=len(STATES))
+        return {name: int(n) for name, n in zip(STATES, totals)}
+
+    def mission_coords(self, i):
+        """Waypoint ``(lat, lng)`` arrays of drone ``i``'s mission."""
+        start, n = self.mission_start[i], self.mission_len[i]
+        return self._wp_lat[start:start + n], self._wp_lng[start:start + n]
+
+    def waypoint_coords(self, drones, wp):
+        """``(lat, lng)`` arrays of waypoint ``wp[k]`` of the mission of each of ``drones[k]``."""
+        pool_index = self.mission_start[drones] + wp
+        return self._wp_lat[pool_index], self._wp_lng[pool_index]
+
+    def to_dict(self, i):
+        wp = int(self.current_wp_index[i])
+        return {
+            "armed": bool(self.armed[i]),
+            "altitude": int(self.altitude[i]),
+            "mission": self.missions[i],
+            "current_wp_index": None if wp == NO_WAYPOINT else wp,
+            "state": STATES[self.state[i]],
+            "battery": int(self.battery[i]),
+            "gps_locked": bool(self.gps_locked[i]),
+            "flight_mode": FLIGHT_MODES[self.flight_mode[i]],
+            "lat": None if np.isnan(self.lat[i]) else float(self.lat[i]),
+            "lng": None if np.isnan(self.lng[i]) else float(self.lng[i]),
+        }
+
+
+class FleetSnapshot(FleetView):
+    """Read-only copy of a fleet's drone columns at one point in time.
+
+    Snapshots are never modified after construction, so any number of threads
+    can read one without locking while the fleet itself keeps changing.
+
+    Given the ``previous`` snapshot of the same fleet, columns that no drone
+    changed since are shared with it rather than copied. A drone's version
+    identifies its whole row (versions never repeat), so only the drones whose
+    version moved need comparing; a write still costs a full copy of each
+    column it touched, ``version`` always among them.
+    """
+
+    def __init__(self, fleet, previous=None):
+        self.size = fleet.size
+        self.home = fleet.home
+        self.mission_radius_km = fleet.mission_radius_km
+        self.deconfliction = fleet.deconfliction
+        if previous is not None and previous.size == fleet.size:
+            changed = np.flatnonzero(fleet.version != previous.version)
+        else:
+            previous = changed = None
+        # Pool compaction moves every mission_start without touching versions
+        # but always swaps in new pool arrays.
+        pool_moved = previous is None or previous._wp_lat is not fleet._wp_lat
+        for name in (*FIELDS, "version"):
+            column = getattr(fleet, name)
+            if previous is not None and not (name == "mission_start" and pool_moved):
+                shared = getattr(previous, name)
+                if np.array_equal(shared[changed], column[changed], equal_nan=column.dtype.kind == "f"):
+                    setattr(self, name, shared)
+                    continue
+            column = column.copy()
+            column.flags.writeable = False
+            setattr(self, name, column)
+        # Missions are replaced, never edited in place, so sharing them is safe.
+        # Waypoint pool entries are only appended after this, or the pool is
+        # replaced on compaction, so the arrays stay valid for our mission_start.
+        if previous is not None and self.mission_version is previous.mission_version:
+            self.missions = previous.missions
+        else:
+            self.missions = tuple(fleet.missions)
+        self._wp_lat, self._wp_lng = fleet._wp_lat, fleet._wp_lng
+
+
+class DroneSubset:
+    """Copies of the columns of some drones, stepped by ``Fleet.tick`` and written back."""
+
+    def __init__(self, fleet, drones):
+        self.fleet = fleet
+        self.drones = drones
+        for name in (*FIELDS, "version"):
+            setattr(self, name, getattr(fleet, name)[drones])
+
+    def write_back(self):
+        for name in (*FIELDS, "version"):
+            getattr(self.fleet, name)[self.drones] = getattr(self, name)
+
+
+class Fleet(FleetView):
+    """Struct-of-arrays registry of simulated drones.
+
+    Drone ``i`` is element ``i`` of every column in ``FIELDS``; missions are
+    kept as plain lists since they are only read when serializing. Waypoint
+    coordinates are also packed into one shared pool, drone ``i`` owning
+    ``mission_len[i]`` entries from ``mission_start[i]``, so positions can be
+    updated for the whole fleet at once. Drones start at the ``home`` position
+    and move to each waypoint as they reach it; mission waypoints must lie
+    within ``mission_radius_km`` of home and, given a ``deconfliction``, keep
+    clear of the missions other drones are flying.
+
+    ``version[i]`` changes whenever drone ``i`` changes. Versions come from one
+    fleet-wide counter, so they never repeat even across resets and resizes.
+    """
+
+    def __init__(self, size=1, home=(np.nan, np.nan), mission_radius_km=DEFAULT_MISSION_RADIUS_KM, deconfliction=None):
+        self.size = 0
+        self.last_version = 0
+        self.home = home
+        self.mission_radius_km = mission_radius_km
+        self.deconfliction = deconfliction
+        self._wp_lat = np.empty(MIN_POOL_CAPACITY)
+        self._wp_lng = np.empty(MIN_POOL_CAPACITY)
+        self._pool_used = 0
+        for name, (dtype, _) in FIELDS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.version = np.zeros(0, dtype=np.int64)
+        self.missions = []
+        self.resize(size)
+
+    def _next_version(self):
+        self.last_version += 1
+        return self.last_version
+
+    def touch(self, i):
+        """Mark drone ``i`` as changed."""
+        self.version[i] = self._next_version()
+
+    def resize(self, size):
+        """Grow or shrink the fleet, new drones start in the default state."""
+        old = self.size
+        keep = min(old, size)
+        for name, (dtype, default) in FIELDS.items():
+            column = np.full(size, default, dtype=dtype)
+            column[:keep] = getattr(self, name)[:keep]
+            setattr(self, name, column)
+        self.lat[keep:], self.lng[keep:] = self.home
+        version = np.full(size, self._next_version(), dtype=np.int64)
+        version[:keep] = self.version[:keep]
+        self.version = version
+        self.missions = self.missions[:size] + [[] for _ in range(size - old)]
+        self.size = size
+
+    def snapshot(self, previous=None):
+        """Immutable copy of the fleet, sharing unchanged columns with the ``previous`` one."""
+        return FleetSnapshot(self, previous)
+
+    def checkpoint(self):
+        """Copy of the fleet state that ``restore`` can roll back to."""
+        return {
+            "size": self.size,
+            "columns": {name: getattr(self, name).copy() for name in (*FIELDS, "version")},
+            "missions": list(self.missions),
+            # Pool entries are only appended after the checkpoint, or the pool
+            # is replaced on compaction, so the saved arrays stay valid.
+            "pool": (self._wp_lat, self._wp_lng, self._pool_used),
+        }
+
+    def restore(self, checkpoint):
+        self.size = checkpoint["size"]
+        for name, column in checkpoint["columns"].items():
+            setattr(self, name, column.copy())
+        self.missions = list(checkpoint["missions"])
+        self._wp_lat, self._wp_lng, self._pool_used = checkpoint["pool"]
+
+    def reset(self, i):
+        for name, (_, default) in FIELDS.items():
+            getattr(self, name)[i] = default
+        self.lat[i], self.lng[i] = self.home
+        self.missions[i] = []
+
+    def set_mission(self, i, mission, lat=None, lng=None):
+        """Assign a mission; ``lat``/``lng`` arrays may be passed to skip extracting them."""
+        if lat is None:
+            lat = np.array([wp.get("lat", np.nan) for wp in mission], dtype=np.float64)
+            lng = np.array([wp.get("lng", np.nan) for wp in mission], dtype=np.float64)
+        self.missions[i] = mission
+        self.mission_version[i] = self._next_version()
+        self.mission_len[i] = 0
+        self.mission_start[i] = self._store_waypoints(lat, lng)
+        self.mission_len[i] = len(mission)
+
+    def _store_waypoints(self, lat, lng):
+        """Append coordinates to the waypoint pool and return their offset."""
+        n = len(lat)
+        if self._pool_used + n > len(self._wp_lat):
+            self._compact_pool(n)
+        start = self._pool_used
+        self._wp_lat[start:start + n] = lat
+        self._wp_lng[start:start + n] = lng
+        self._pool_used += n
+        return start
+
+    def _compact_pool(self, extra):
+        """Drop waypoints of replaced missions, growing the pool to fit ``extra`` more."""
+        lengths = self.mission_len.astype(np.int64)
+        total = int(lengths.sum())
+        new_start = np.cumsum(lengths) - lengths
+        source = np.repeat(self.mission_start - new_start, lengths) + np.arange(total)
+
+        capacity = max(2 * (total + extra), MIN_POOL_CAPACITY)
+        wp_lat, wp_lng = np.empty(capacity), np.empty(capacity)
+        wp_lat[:total] = self._wp_lat[source]
+        wp_lng[:total] = self._wp_lng[source]
+        self._wp_lat, self._wp_lng = wp_lat, wp_lng
+        self.mission_start[:] = new_start
+        self._pool_used = total
+
+    def failsafe(self, drones):
+        """Send drones (mask or indices) into a FAILSAFE landing."""
+        self.state[drones] = LANDING
+        self.flight_mode[drones] = FAILSAFE
+        self.current_wp_index[drones] = NO_WAYPOINT
+
+    def tick(self, geofences=None, drones=None):
+        """Advance every drone by one telemetry step using batched array ops.
+
+        Flying drones that end the tick in breach of ``geofences`` are sent into
+        a FAILSAFE landing, like on critical battery. ``drones`` (sorted indices)
+        limits the step to those drones and leaves the others untouched.
+        """
+        if drones is None:
+            return self._tick(self, geofences)
+        part = DroneSubset(self, drones)
+        events = self._tick(part, geofences)
+        part.write_back()
+        return TickEvents(*(drones[local] for local in events))
+
+    def _tick(self, cols, geofences):
+        """One step of the drones in ``cols``, the fleet itself or a ``DroneSubset``."""
+        state = cols.state
+        altitude = cols.altitude
+        battery = cols.battery
+        wp = cols.current_wp_index
+
+        active = state != DISARMED
+        flying = state == FLYING
+        landing = state == LANDING
+
+        # Every active drone changes on a tick (battery, altitude or state)
+        cols.version[active] = self._next_version()
+
+        battery -= active
+        np.maximum(battery, 0, out=battery)
+
+        altitude[:] = np.where(
+            flying,
+            np.minimum(altitude + CLIMB_RATE, MAX_ALTITUDE),
+            np.where(landing, np.maximum(altitude - DESCENT_RATE, 0), altitude),
+        )
+
+        failsafe = flying & (battery <= FAILSAFE_BATTERY)
+        state[failsafe] = LANDING
+        cols.flight_mode[failsafe] = FAILSAFE
+        wp[failsafe] = NO_WAYPOINT
+
+        on_route = flying & ~failsafe & (cols.mission_len > 0) & (wp != NO_WAYPOINT)
+        last_wp = cols.mission_len - 1
+
+        # Drones arrive at the waypoint they were heading to
+        arrived = np.flatnonzero(on_route & (wp <= last_wp))
+        pool_index = cols.mission_start[arrived] + wp[arrived]
+        cols.lat[arrived] = self._wp_lat[pool_index]
+        cols.lng[arrived] = self._wp_lng[pool_index]
+
+        complete = on_route & (wp == last_wp)
+        wp += on_route & (wp < last_wp)
+        state[complete] = LANDING
+        cols.flight_mode[complete] = MANUAL
+        wp[complete] = NO_WAYPOINT
+
+        disarm = (altitude == 0) & (state != DISARMED)
+        state[disarm] = DISARMED
+        cols.armed[disarm] = False
+        cols.flight_mode[disarm] = MANUAL
+        wp[disarm] = NO_WAYPOINT
+
+        breach = np.zeros(0, dtype=np.int64)
+        if geofences:
+            airborne = np.flatnonzero(state == FLYING)
+            breach = airborne[geofences.breaches(cols.lat[airborne], cols.lng[airborne])]
+            state[breach] = LANDING
+            cols.flight_mode[breach] = FAILSAFE
+            wp[breach] = NO_WAYPOINT
+
+        return TickEvents(
+            np.flatnonzero(failsafe),
+            np.flatnonzero(complete),
+            np.flatnonzero(disarm),
+            breach,
+        )
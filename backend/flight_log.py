@@ -0,0 +1,319 @@
+"""Binary flight log recorder and replay engine.
+
+A log is a header followed by fixed-size little-endian records, so it can be
+appended to while flying and memory-mapped as a NumPy array when replaying.
+Every command, every tick and every automatic transition is recorded together
+with the resulting state of the drone it affected.
+
+Usage: python flight_log.py <log> [--speed N]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a second writer is not detected
+    fcntl = None
+
+from commands import COMMANDS, FAILURE_MODES, CommandError
+from fleet import Fleet, TickEvents
+
+MAGIC = b"UAVFLOG1"
+
+EVENTS = (
+    "start", "fleet_size", "tick", "waypoint",
+    # Commands, named as in commands.COMMANDS
+    "arm", "takeoff", "land", "mission", "inject_failure", "clear_mission", "reset",
+    # Automatic transitions, named as the TickEvents fields
+    "failsafe", "mission_complete", "disarmed", "geofence_breach",
+)
+EVENT_CODES = {name: code for code, name in enumerate(EVENTS)}
+FLEET_WIDE = 0xFFFFFFFF  # drone id of records that are not about one drone
+INVALID_MODE = 0xFF
+
+# 48-byte record, fields laid out on their natural alignment
+RECORD_DTYPE = np.dtype([
+    ("tick", "<u4"),
+    ("drone", "<u4"),
+    ("current_wp_index", "<i4"),
+    ("value", "<i4"),  # fleet size, waypoint count/index or failure mode
+    ("battery", "<i2"),
+    ("altitude", "<i2"),
+    ("event", "u1"),
+    ("ok", "u1"),
+    ("state", "u1"),
+    ("flight_mode", "u1"),
+    ("armed", "u1"),
+    ("gps_locked", "u1"),
+    ("_pad", "V6"),
+    ("lat", "<f8"),
+    ("lng", "<f8"),
+])
+
+# Header padded to one record so records stay aligned when memory-mapped
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("record_size", "<u4"),
+    ("_pad", "<u4"),
+    ("tick_period", "<f8"),
+    ("home_lat", "<f8"),
+    ("home_lng", "<f8"),
+    ("_reserved", "V8"),
+])
+assert HEADER_DTYPE.itemsize == RECORD_DTYPE.itemsize
+
+# Drone columns stored with each record, compared when replaying
+STATE_COLUMNS = ("state", "flight_mode", "armed", "gps_locked", "battery", "altitude", "current_wp_index", "lat", "lng")
+
+
+class FlightRecorder:
+    """Appends flight log records to ``path``, writing the header for new files.
+
+    The file is locked for the life of the recorder, so a second process
+    recording to the same log fails instead of interleaving its ticks.
+    """
+
+    def __init__(self, path, tick_period, home):
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                raise RuntimeError(f"Flight log {path} is already being recorded by another process")
+        if self._file.tell() == 0:
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["record_size"] = RECORD_DTYPE.itemsize
+            header["tick_period"] = tick_period
+            header["home_lat"], header["home_lng"] = home
+            self._file.write(header.tobytes())
+
+    def _write(self, records, flush=False):
+        with self._lock:
+            self._file.write(records.tobytes())
+            if flush:
+                self._file.flush()
+
+    def _drone_records(self, event, tick, drones, fleet, ok=1, value=0):
+        drones = np.asarray(drones, dtype=np.int64).reshape(-1)
+        records = np.zeros(len(drones), dtype=RECORD_DTYPE)
+        records["tick"] = tick
+        records["drone"] = drones
+        records["event"] = EVENT_CODES[event]
+        records["ok"] = ok
+        records["value"] = value
+        for name in STATE_COLUMNS:
+            records[name] = getattr(fleet, name)[drones]
+        return records
+
+    def _fleet_record(self, event, tick, value=0):
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["tick"] = tick
+        record["drone"] = FLEET_WIDE
+        record["event"] = EVENT_CODES[event]
+        record["value"] = value
+        return record
+
+    def start(self, tick, fleet):
+        """Mark a new session starting from a fresh fleet of ``fleet.size`` drones."""
+        self._write(self._fleet_record("start", tick, fleet.size), flush=True)
+
+    def resize(self, tick, size):
+        self._write(self._fleet_record("fleet_size", tick, size))
+
+    def tick(self, tick, fleet, events):
+        records = [self._fleet_record("tick", tick)]
+        for name, drones in zip(TickEvents._fields, events):
+            if len(drones):
+                records.append(self._drone_records(name, tick, drones, fleet))
+        self._write(np.concatenate(records), flush=True)
+
+    def write(self, records):
+        self._write(records)
+
+    def command(self, tick, name, drone_id, fleet, ok, params):
+        self._write(self.command_records(tick, name, drone_id, fleet, ok, params))
+
+    def command_records(self, tick, name, drone_id, fleet, ok, params):
+        """Records of one command, for callers that write them later (or never)."""
+        value = 0
+        records = []
+        if name == "inject_failure":
+            mode = params.get("mode")
+            value = FAILURE_MODES.index(mode) if mode in FAILURE_MODES else INVALID_MODE
+        elif name == "mission" and ok:
+            # Waypoint coordinates precede the mission record that uses them
+            lat, lng = fleet.mission_coords(drone_id)
+            value = len(lat)
+            waypoints = np.zeros(len(lat), dtype=RECORD_DTYPE)
+            waypoints["tick"] = tick
+            waypoints["drone"] = drone_id
+            waypoints["event"] = EVENT_CODES["waypoint"]
+            waypoints["value"] = np.arange(len(lat))
+            waypoints["lat"], waypoints["lng"] = lat, lng
+            records.append(waypoints)
+        records.append(self._drone_records(name, tick, [drone_id], fleet, int(ok), value))
+        return np.concatenate(records)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def open_log(path):
+    """Return the log header and its records as a read-only memory map."""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a flight log")
+    if header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has unsupported record size {header['record_size'][0]}")
+
+    # A partially written trailing record is ignored
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return header[0], np.zeros(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+    return header[0], records
+
+
+class ReplayResult:
+    def __init__(self, max_mismatches):
+        self.records = 0
+        self.ticks = 0
+        self.mismatch_count = 0
+        self.mismatches = []
+        self.max_mismatches = max_mismatches
+        self.elapsed = 0.0
+
+    def mismatch(self, index, tick, drone, event, field, expected, actual):
+        self.mismatch_count += 1
+        if len(self.mismatches) < self.max_mismatches:
+            self.mismatches.append({
+                "record": index, "tick": tick, "drone": drone, "event": event,
+                "field": field, "expected": expected, "actual": actual,
+            })
+
+    def to_dict(self):
+        return {
+            "records": self.records,
+            "ticks": self.ticks,
+            "elapsed": round(self.elapsed, 6),
+            "mismatch_count": self.mismatch_count,
+            "mismatches": self.mismatches,
+        }
+
+
+def replay(path, speed=None, max_mismatches=100, chunk_size=65536):
+    """Feed a flight log through the state machine and verify every recorded state.
+
+    Ticks run ``speed`` times faster than recorded, or as fast as possible when
+    ``speed`` is None. Commands are re-executed, automatic transitions must be
+    reproduced by the replayed tick, and after each record the drone's state is
+    compared with the logged state (and resynced to it on mismatch). Geofence
+    zones are not logged, so recorded breaches are applied rather than checked.
+    """
+    header, records = open_log(path)
+    home = (float(header["home_lat"]), float(header["home_lng"]))
+    tick_period = float(header["tick_period"])
+
+    def new_fleet(size):
+        # Logged waypoints were already validated when they were uploaded
+        return Fleet(size, home=home, mission_radius_km=math.inf)
+
+    result = ReplayResult(max_mismatches)
+    fleet = new_fleet(1)
+    expected = set()  # (event, drone) transitions produced by the replayed tick
+    waypoints = {}
+    first_tick = None
+    started = time.perf_counter()
+
+    def check_pending(index, tick):
+        for event, drone in sorted(expected):
+            result.mismatch(index, tick, drone, event, "event", None, event)
+        expected.clear()
+
+    for offset in range(0, len(records), chunk_size):
+        for index, record in enumerate(records[offset:offset + chunk_size].tolist(), offset):
+            record = dict(zip(RECORD_DTYPE.names, record))
+            tick, drone, code, ok, value = (record[k] for k in ("tick", "drone", "event", "ok", "value"))
+            event = EVENTS[code]
+
+            if event == "tick":
+                check_pending(index, tick)
+                if speed is not None:
+                    first_tick = tick if first_tick is None else first_tick
+                    delay = started + (tick - first_tick) * tick_period / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                events = fleet.tick()
+                expected = {(name, int(i)) for name, drones in zip(TickEvents._fields, events) for i in drones}
+                result.ticks += 1
+                continue
+            if event == "start":
+                check_pending(index, tick)
+                fleet = new_fleet(value)
+                waypoints.clear()
+                continue
+            if event == "fleet_size":
+                fleet.resize(value)
+                continue
+            if event == "waypoint":
+                waypoints.setdefault(drone, []).append({"lat": record["lat"], "lng": record["lng"]})
+                continue
+
+            if event == "geofence_breach":
+                fleet.failsafe(drone)
+            elif event in TickEvents._fields:
+                if (event, drone) in expected:
+                    expected.discard((event, drone))
+                else:
+                    result.mismatch(index, tick, drone, event, "event", event, None)
+            elif event == "mission" and not ok:
+                pass  # rejected uploads do not change state and their input is not logged
+            else:
+                if event == "mission":
+                    params = {"waypoints": waypoints.pop(drone, [])}
+                elif event == "inject_failure":
+                    params = {"mode": FAILURE_MODES[value] if value < len(FAILURE_MODES) else None}
+                else:
+                    params = {}
+                try:
+                    COMMANDS[event](fleet, drone, params)
+                    replay_ok = True
+                except CommandError:
+                    replay_ok = False
+                if replay_ok != bool(ok):
+                    result.mismatch(index, tick, drone, event, "ok", bool(ok), replay_ok)
+
+            for name in STATE_COLUMNS:
+                want = record[name]
+                column = getattr(fleet, name)
+                got = column[drone].item()
+                if got != want and not (name in ("lat", "lng") and math.isnan(got) and math.isnan(want)):
+                    result.mismatch(index, tick, drone, event, name, want, got)
+                    column[drone] = want
+
+    check_pending(len(records), None)
+    result.records = len(records)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a flight log and verify the recorded states")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, help="replay N times faster than recorded (default: as fast as possible)")
+    args = parser.parse_args()
+
+    result = replay(args.path, args.speed)
+    print(json.dumps(result.to_dict(), indent=2))
+    sys.exit(1 if result.mismatch_count else 0)
@@ -0,0 +1,71 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Generated points are pulled this far inside the radius so that rounding
+# coordinates to 6 decimals (~0.1 m) can never push them outside.
+ROUNDING_MARGIN_KM = 0.001
+
+
+# Helper: Haversine distance in KM, works on scalars and NumPy arrays alike
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(v) for v in (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def is_within_radius(lat1, lng1, lat2, lng2, radius_km):
+    return haversine_km(lat1, lng1, lat2, lng2) <= radius_km
+
+
+def sample_in_radius(n, lat, lng, radius_km, rng):
+    """Draw ``n`` points uniformly distributed over the circle around ``(lat, lng)``.
+
+    Distances are drawn so the points are uniform over the spherical cap and
+    projected with the destination-point formula, so no sample is ever rejected.
+    """
+    max_angle = max(radius_km - ROUNDING_MARGIN_KM, 0) / EARTH_RADIUS_KM
+    angle = 2 * np.arcsin(np.sqrt(rng.random(n)) * np.sin(max_angle / 2))
+    bearing = rng.uniform(0, 2 * np.pi, n)
+
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearing))
+    lng2 = lng1 + np.arctan2(
+        np.sin(bearing) * np.sin(angle) * np.cos(lat1),
+        np.cos(angle) - np.sin(lat1) * np.sin(lat2),
+    )
+    return np.degrees(lat2), (np.degrees(lng2) + 540) % 360 - 180
+
+
+def distance_matrix_km(lat, lng, dtype=np.float32, block_rows=512):
+    """Pairwise haversine distances in KM between points, as an ``(n, n)`` matrix.
+
+    The haversine of the central angle is the squared half chord between the
+    points on the unit sphere, so the chords come from one matrix product of
+    unit vectors (centred first, which keeps the subtraction exact enough for
+    points metres apart). Rows are computed ``block_rows`` at a time and
+    stored as ``dtype`` to bound the temporary memory.
+    """
+    lat, lng = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lng, dtype=np.float64))
+    points = np.stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)], axis=1)
+    points -= points.mean(axis=0)
+    norms = (points ** 2).sum(axis=1)
+
+    n = len(points)
+    out = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, block_rows):
+        rows = slice(start, start + block_rows)
+        # |p - q|^2 = |p|^2 + |q|^2 - 2 p.q, then 2R asin(chord / 2)
+        chord = points[rows] @ points.T
+        chord *= -2
+        chord += norms[rows, None]
+        chord += norms
+        np.sqrt(np.clip(chord, 0, 4, out=chord), out=chord)
+        chord /= 2
+        np.arcsin(chord, out=chord)
+        chord *= 2 * EARTH_RADIUS_KM
+        out[rows] = chord
+    np.fill_diagonal(out, 0)
+    return out
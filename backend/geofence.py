@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+
+KINDS = ("inclusion", "exclusion")
+
+# Grid cell size in degrees (~550 m of latitude)
+DEFAULT_CELL_DEG = 0.005
+# Zones whose bounding box spans more cells are not put in the grid (~35 km square at the default size)
+MAX_INDEXED_CELLS = 4096
+MAX_POINTS = 10000
+# Bounds the (points x edges) ray casting matrices of ``Geofence.contains``
+CONTAINS_BLOCK = 1 << 20
+
+
+def cell_key(row, col):
+    """Pack grid row/column indices (scalars or arrays) into one integer key."""
+    return row * (1 << 32) + col
+
+
+class Geofence:
+    """Named polygon zone; ``points`` is an (n, 2) array of lat/lng vertices."""
+
+    def __init__(self, name, kind, points):
+        if kind not in KINDS:
+            raise ValueError(f"Invalid geofence kind: {kind}")
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError("Geofence needs at least 3 [lat, lng] points")
+        if not np.isfinite(points).all():
+            raise ValueError("Geofence points must be finite numbers")
+        if len(points) > MAX_POINTS:
+            raise ValueError(f"Geofence may have at most {MAX_POINTS} points")
+        if (np.abs(points[:, 0]) > 90).any() or (np.abs(points[:, 1]) > 180).any():
+            raise ValueError("Geofence points must be valid latitudes and longitudes")
+
+        self.name = name
+        self.kind = kind
+        self.points = points
+        self.min_lat, self.min_lng = points.min(axis=0)
+        self.max_lat, self.max_lng = points.max(axis=0)
+        # Edges as start/end vertex columns for vectorized ray casting;
+        # horizontal edges never cross the ray so their slope is irrelevant
+        self._lat1, self._lng1 = points[:, 0], points[:, 1]
+        self._lat2 = np.roll(points[:, 0], -1)
+        dlat = self._lat2 - self._lat1
+        dlng = np.roll(points[:, 1], -1) - self._lng1
+        self._slope = dlng / np.where(dlat == 0, 1, dlat)
+
+    def contains(self, lat, lng):
+        """Even-odd ray casting of many points against this polygon."""
+        inside = np.zeros(len(lat), dtype=bool)
+        in_box = (
+            (lat >= self.min_lat) & (lat <= self.max_lat)
+            & (lng >= self.min_lng) & (lng <= self.max_lng)
+        )
+        candidates = np.flatnonzero(in_box)
+        block = max(CONTAINS_BLOCK // len(self.points), 1)
+        for start in range(0, candidates.size, block):
+            points = candidates[start:start + block]
+            plat = lat[points, None]
+            plng = lng[points, None]
+            crosses = (self._lat1 > plat) != (self._lat2 > plat)
+            lng_at = self._lng1 + (plat - self._lat1) * self._slope
+            hits = crosses & (plng < lng_at)
+            inside[points] = hits.sum(axis=1) % 2 == 1
+        return inside
+
+    def to_dict(self):
+        return {"name": self.name, "kind": self.kind, "points": self.points.tolist()}
+
+
+class GeofenceIndex:
+    """Polygon geofences bucketed into a uniform lat/lng grid.
+
+    Each zone is registered in every cell its bounding box overlaps, so a
+    containment query only looks up the cells holding points and tests the
+    zones registered there. Zones overlapping more than ``MAX_INDEXED_CELLS``
+    cells stay out of the grid and are tested against every point, which
+    their bounding box check keeps cheap. A point breaches if it is inside
+    any exclusion zone, or if inclusion zones exist and it is inside none of
+    them.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.zones = {}
+        self._cells = {}  # grid cell -> names of the zones whose bounding box overlaps it
+        self._zone_cells = {}  # zone name -> its grid cells, None for zones too large to index
+        self._inclusion_count = 0
+
+    def __len__(self):
+        return len(self.zones)
+
+    def add(self, zone):
+        """Add a zone, replacing any zone with the same name."""
+        self.remove(zone.name)
+        self.zones[zone.name] = zone
+        self._inclusion_count += zone.kind == "inclusion"
+        row0, col0 = math.floor(zone.min_lat / self.cell_deg), math.floor(zone.min_lng / self.cell_deg)
+        row1, col1 = math.floor(zone.max_lat / self.cell_deg), math.floor(zone.max_lng / self.cell_deg)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > MAX_INDEXED_CELLS:
+            self._zone_cells[zone.name] = None
+            return
+        cells = [cell_key(row, col) for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)]
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(zone.name)
+        self._zone_cells[zone.name] = cells
+
+    def remove(self, name):
+        zone = self.zones.pop(name, None)
+        if zone is None:
+            return False
+        self._inclusion_count -= zone.kind == "inclusion"
+        for cell in self._zone_cells.pop(name) or ():
+            names = self._cells[cell]
+            names.remove(name)
+            if not names:
+                del self._cells[cell]
+        return True
+
+    def breaches(self, lat, lng):
+        """Boolean mask of the points that violate the geofences."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        included = np.zeros(len(lat), dtype=bool)
+        excluded = np.zeros(len(lat), dtype=bool)
+        if len(lat) == 0 or not self.zones:
+            return excluded
+
+        # Bucket the points by grid cell
+        keys = cell_key(
+            np.floor(lat / self.cell_deg).astype(np.int64),
+            np.floor(lng / self.cell_deg).astype(np.int64),
+        )
+        order = np.argsort(keys, kind="stable")
+        cells, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(keys)).tolist()
+
+        # Only cells holding points are looked up; each point lies in one
+        # cell, so a zone tests every candidate point once
+        buckets = {name: [np.arange(len(lat))] for name, indexed in self._zone_cells.items() if indexed is None}
+        for c, cell in enumerate(cells.tolist()):
+            for name in self._cells.get(cell, ()):
+                buckets.setdefault(name, []).append(order[bounds[c]:bounds[c + 1]])
+
+        for name, members in buckets.items():
+            zone = self.zones[name]
+            members = np.concatenate(members)
+            inside = members[zone.contains(lat[members], lng[members])]
+            if zone.kind == "inclusion":
+                included[inside] = True
+            else:
+                excluded[inside] = True
+
+        if self._inclusion_count:
+            return excluded | ~included
+        return excluded
+
+    def to_list(self):
+        return [zone.to_dict() for zone in list(self.zones.values())]
@@ -0,0 +1,70 @@
+"""Leveled, rate-limited structured logging: one JSON object per line.
+
+Log the event name as the message and its data as ``extra={"fields": {...}}``.
+Each event passes at most ``burst`` times per ``interval`` seconds; the next
+record let through reports how many were suppressed in between.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+LOGGER_NAME = "gcs"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=10.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._windows = {}  # (logger, event) -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, suppressed]
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+
+        if suppressed:
+            record.fields = {**getattr(record, "fields", {}), "suppressed": suppressed}
+        return True
+
+
+def get_logger(name=None):
+    return logging.getLogger(LOGGER_NAME if name is None else f"{LOGGER_NAME}.{name}")
+
+
+def configure(level=None, interval=10.0, burst=5, stream=None):
+    """Send ``gcs.*`` logs to ``stream`` (stderr) as JSON, at ``LOG_LEVEL`` (INFO) by default."""
+    logger = logging.getLogger(LOGGER_NAME)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(RateLimitFilter(interval, burst))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level or os.environ.get("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    return logger
@@ -0,0 +1,169 @@
+"""Prometheus-style counters, gauges and histograms served at ``/api/metrics``.
+
+Recording only appends the value to a per-series deque (atomic, no lock), so
+it is cheap enough for every request and tick. Pending values are folded
+into totals and bucket counts with NumPy when the metrics are read, or once
+``MAX_PENDING`` values have piled up. ``Registry.render`` produces the
+Prometheus text exposition format.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+# Latency buckets in seconds, 100 µs to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+MAX_PENDING = 4096
+
+
+def format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Series:
+    """Values recorded for one label combination, buffered until folded."""
+
+    def __init__(self, bounds=None):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.total = 0.0
+        self.count = 0
+        self.buckets = None if bounds is None else np.zeros(len(bounds) + 1, dtype=np.int64)
+        self.value = 0  # gauges are set directly
+
+    def add(self, value):
+        pending = self._pending
+        pending.append(value)
+        if len(pending) > MAX_PENDING:
+            self.fold()
+
+    def fold(self):
+        with self._lock:
+            pending = self._pending
+            # Values appended meanwhile stay queued for the next fold
+            values = np.array([pending.popleft() for _ in range(len(pending))], dtype=np.float64)
+            if values.size == 0:
+                return
+            self.total += float(values.sum())
+            self.count += values.size
+            if self.buckets is not None:
+                index = np.searchsorted(self._bounds, values, side="left")
+                self.buckets += np.bincount(index, minlength=len(self.buckets))
+
+
+class Metric:
+    """A named metric with one ``Series`` per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        return Series()
+
+    def labels(self, *values):
+        """Series for the given label values, created on first use."""
+        series = self._children.get(values)
+        if series is None:
+            with self._lock:
+                series = self._children.setdefault(values, self._new_series())
+        return series
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in sorted(self._children.items(), key=lambda item: tuple(map(str, item[0]))):
+            series.fold()
+            lines.extend(self._render_series(values, series))
+        return lines
+
+    def _render_series(self, values, series):
+        return [f"{self.name}{format_labels(self.label_names, values)} {format_value(series.total)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self.labels().add(amount)
+
+    def value(self, *values):
+        series = self.labels(*values)
+        series.fold()
+        return series.total
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, *values):
+        self.labels(*values).value = value
+
+    def _render_series(self, values, series):
+        return [f"{self.name}{format_labels(self.label_names, values)} {format_value(series.value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = np.array(buckets, dtype=np.float64)
+
+    def _new_series(self):
+        return Series(self.buckets)
+
+    def observe(self, value):
+        self.labels().add(value)
+
+    def count(self, *values):
+        series = self.labels(*values)
+        series.fold()
+        return series.count
+
+    def _render_series(self, values, series):
+        lines = []
+        cumulative = np.cumsum(series.buckets).tolist()
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for bound, total in zip(bounds, cumulative):
+            labels = format_labels(self.label_names, values, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{labels} {total}")
+        labels = format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {format_value(series.total)}")
+        lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
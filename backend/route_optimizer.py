@@ -0,0 +1,204 @@
+"""Waypoint order optimization for missions.
+
+A drone flies from its start point through every waypoint and lands at the
+last one, so a route is an open path with a fixed start and a free end. The
+path is built greedily by nearest neighbour over a haversine distance matrix,
+then improved with 2-opt moves (reverse a stretch of the path) and Or-opt
+moves (move a run of up to three waypoints elsewhere, either way round) until
+no move helps or the time budget runs out. Moves are only tried towards each
+waypoint's nearest neighbours, driven by a queue of waypoints whose
+surroundings changed, so a pass over the route costs O(n), not O(n^2).
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+from geo import distance_matrix_km, haversine_km
+
+DEFAULT_TIME_BUDGET = 1.0  # seconds
+MAX_WAYPOINTS = 10000  # the distance matrix takes 4 bytes per pair
+NEIGHBOURS = 8
+OR_OPT_MAX_RUN = 3
+MIN_GAIN_KM = 1e-7  # below the float32 resolution of the matrix
+
+
+def path_length_km(lat, lng, start=None):
+    """Length of the path through the points in order, from ``start`` (lat, lng) if given."""
+    lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+    if start is not None:
+        lat, lng = np.concatenate([[start[0]], lat]), np.concatenate([[start[1]], lng])
+    if len(lat) < 2:
+        return 0.0
+    return float(haversine_km(lat[:-1], lng[:-1], lat[1:], lng[1:]).sum())
+
+
+def optimize_route(lat, lng, start=None, time_budget=DEFAULT_TIME_BUDGET):
+    """Order of the waypoints (indices into ``lat``/``lng``) giving a short path from ``start``.
+
+    Without a start point the path may begin at any waypoint.
+    """
+    deadline = time.perf_counter() + time_budget
+    n = len(lat)
+    if n > MAX_WAYPOINTS:
+        raise ValueError(f"Route optimization supports at most {MAX_WAYPOINTS} waypoints")
+    if n < 3:
+        return np.arange(n)
+
+    # Node 0 is the start; without one it is a dummy at distance 0 from everything
+    if start is None:
+        dist = np.zeros((n + 1, n + 1), dtype=np.float32)
+        dist[1:, 1:] = distance_matrix_km(lat, lng)
+    else:
+        dist = distance_matrix_km(np.concatenate([[start[0]], lat]), np.concatenate([[start[1]], lng]))
+
+    path = nearest_neighbour_path(dist)
+    improve_path(dist, path, nearest_neighbours(dist, min(NEIGHBOURS, n)), deadline)
+    return path[1:] - 1
+
+
+def nearest_neighbour_path(dist):
+    """Greedy path from node 0, always moving to the closest unvisited node."""
+    n = len(dist)
+    path = np.empty(n, dtype=np.int64)
+    path[0] = current = 0
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    for k in range(1, n):
+        current = int(np.where(visited, np.inf, dist[current]).argmin())
+        path[k] = current
+        visited[current] = True
+    return path
+
+
+def nearest_neighbours(dist, k, block_rows=512):
+    """The ``k`` nearest other nodes of every node, closest first."""
+    n = len(dist)
+    out = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, block_rows):
+        rows = np.arange(start, min(start + block_rows, n))
+        block = dist[rows].copy()
+        block[np.arange(len(rows)), rows] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1)
+        out[rows] = np.take_along_axis(nearest, order, axis=1)
+    return out
+
+
+def improve_path(dist, path, neighbours, deadline):
+    """Apply improving 2-opt and Or-opt moves to ``path`` in place until none is left or ``deadline``."""
+    n = len(path)
+    last = n - 1
+    pos = np.empty(n, dtype=np.int64)
+    pos[path] = np.arange(n)
+    d = dist.item
+    candidates = [[(int(c), d(a, int(c))) for c in row] for a, row in enumerate(neighbours)]
+
+    queue = deque(range(n))
+    queued = np.ones(n, dtype=bool)
+
+    def wake(*nodes):
+        for node in nodes:
+            if node >= 0 and not queued[node]:
+                queued[node] = True
+                queue.append(node)
+
+    def node_at(i):
+        return int(path[i]) if 0 <= i <= last else -1
+
+    def reverse(i, j):
+        """Reverse path[i..j]."""
+        segment = path[i:j + 1][::-1].copy()
+        path[i:j + 1] = segment
+        pos[segment] = np.arange(i, j + 1)
+
+    def move(i, k, after, flip):
+        """Move the ``k`` nodes from position ``i`` to just after position ``after``."""
+        run = path[i:i + k].copy()
+        if flip:
+            run = run[::-1]
+        if after < i:
+            lo, hi = after + 1, i + k
+            path[lo:hi] = np.concatenate([run, path[after + 1:i]])
+        else:
+            lo, hi = i, after + 1
+            path[lo:hi] = np.concatenate([path[i + k:after + 1], run])
+        pos[path[lo:hi]] = np.arange(lo, hi)
+
+    def two_opt(a):
+        i = int(pos[a])
+        # Replace edges (a, a+) and (c, c+) by (a, c) and (a+, c+)
+        if i < last:
+            b = node_at(i + 1)
+            d_ab = d(a, b)
+            for c, d_ac in candidates[a]:
+                if d_ac >= d_ab:
+                    break
+                j = int(pos[c])
+                e = node_at(j + 1)
+                gain = d_ab - d_ac + (d(c, e) - d(b, e) if e >= 0 else 0)
+                if gain > MIN_GAIN_KM:
+                    reverse(i + 1, j) if j > i else reverse(j + 1, i)
+                    wake(a, b, c, e)
+                    return True
+        # Replace edges (a-, a) and (c-, c) by (a, c) and (a-, c-)
+        if i > 0:
+            p = node_at(i - 1)
+            d_pa = d(p, a)
+            for c, d_ac in candidates[a]:
+                if d_ac >= d_pa:
+                    break
+                j = int(pos[c])
+                if j == 0:
+                    continue
+                q = node_at(j - 1)
+                gain = d_pa + d(q, c) - d_ac - d(p, q)
+                if gain > MIN_GAIN_KM:
+                    reverse(i, j - 1) if j > i else reverse(j, i - 1)
+                    wake(a, p, c, q)
+                    return True
+        return False
+
+    def or_opt(a):
+        i = int(pos[a])
+        if i == 0:
+            return False
+        for k in range(1, OR_OPT_MAX_RUN + 1):
+            if i + k - 1 > last:
+                break
+            end = node_at(i + k - 1)
+            p, nxt = node_at(i - 1), node_at(i + k)
+            removed = d(p, a) + (d(end, nxt) - d(p, nxt) if nxt >= 0 else 0)
+            if removed <= MIN_GAIN_KM:
+                continue
+            for anchor in (a, end):
+                for c, d_c in candidates[anchor]:
+                    if d_c >= removed:
+                        break
+                    j = int(pos[c])
+                    if i <= j < i + k:
+                        continue
+                    # Insert between c and its successor, or its predecessor and c
+                    for u_at in (j, j - 1):
+                        if u_at < 0 or u_at == i - 1 or i <= u_at < i + k:
+                            continue
+                        u, w = node_at(u_at), node_at(u_at + 1)
+                        d_uw = d(u, w) if w >= 0 else 0
+                        for flip in (False, True):
+                            first, second = (end, a) if flip else (a, end)
+                            added = d(u, first) + (d(second, w) if w >= 0 else 0) - d_uw
+                            if removed - added > MIN_GAIN_KM:
+                                move(i, k, u_at, flip)
+                                wake(a, end, p, nxt, u, w)
+                                return True
+        return False
+
+    steps = 0
+    while queue:
+        steps += 1
+        if steps % 64 == 0 and time.perf_counter() > deadline:
+            break
+        a = queue.popleft()
+        queued[a] = False
+        if two_opt(a) or or_opt(a):
+            wake(a)
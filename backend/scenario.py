@@ -0,0 +1,216 @@
+"""Headless Monte Carlo runs of missions with injected failures.
+
+Every run is one drone of a ``Fleet``, so a chunk of runs advances with the
+same ``Fleet.tick`` as the server, driven by an ``EventScheduler`` that only
+steps drones on the ticks where something happens to them, and commands go
+through ``commands.COMMANDS``. Each run uploads a mission, arms, takes off at tick 0,
+gets one failure injected at a random tick and is simulated until it disarms
+or ``max_ticks`` pass. Chunks are spread over a process pool and aggregated
+outcome histograms are streamed as JSON lines while chunks complete.
+
+Usage: python scenario.py [spec.json] [--workers N]
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from commands import COMMANDS, FAILURE_MODES, CommandError
+from event_scheduler import EventScheduler
+from fleet import Fleet
+
+DEFAULT_SPEC = {
+    "runs": 100000,
+    "seed": 0,
+    "chunk_size": 10000,
+    "max_ticks": 400,
+    "mission_length": [1, 60],  # waypoints, inclusive range
+    "inject_tick": [1, 60],  # ticks after takeoff when the failure is injected, inclusive range
+    "failures": {"low_battery": 1, "gps_loss": 1, "motor_fail": 1, "none": 0},
+}
+
+OUTCOMES = ("safe_disarm", "battery_exhausted", "timeout")
+SAFE, EXHAUSTED, TIMEOUT = range(len(OUTCOMES))
+LANDING_CAUSES = ("none", "mission_complete", "failsafe", "motor_fail")
+NO_CAUSE, MISSION_COMPLETE, BATTERY_FAILSAFE, MOTOR_FAIL = range(len(LANDING_CAUSES))
+INJECTIONS = ("accepted", "rejected", "after_disarm")
+ACCEPTED, REJECTED, AFTER_DISARM = range(len(INJECTIONS))
+
+
+def load_spec(spec=None):
+    """Defaults overlaid with ``spec``, validated."""
+    spec = {**DEFAULT_SPEC, **(spec or {})}
+    for key in ("runs", "chunk_size", "max_ticks"):
+        if not isinstance(spec[key], int) or spec[key] < 1:
+            raise ValueError(f"{key} must be a positive integer")
+    for key in ("mission_length", "inject_tick"):
+        lo, hi = spec[key]
+        if not (isinstance(lo, int) and isinstance(hi, int) and 0 <= lo <= hi):
+            raise ValueError(f"{key} must be an inclusive [low, high] range of non-negative integers")
+    failures = spec["failures"]
+    unknown = [mode for mode in failures if mode not in FAILURE_MODES and mode != "none"]
+    if unknown:
+        raise ValueError(f"Unknown failure modes: {', '.join(unknown)}")
+    if sum(failures.values()) <= 0:
+        raise ValueError("Failure weights must add up to a positive number")
+    return spec
+
+
+def empty_result(spec):
+    lengths = spec["mission_length"][1] + 1
+    inject_ticks = spec["inject_tick"][1] + 1
+    modes = len(spec["failures"])
+    return {
+        "runs": 0,
+        "outcomes": np.zeros((modes, len(OUTCOMES)), dtype=np.int64),
+        "landing_causes": np.zeros((modes, len(LANDING_CAUSES)), dtype=np.int64),
+        "injections": np.zeros((modes, len(INJECTIONS)), dtype=np.int64),
+        "by_mission_length": np.zeros((modes, lengths, len(OUTCOMES)), dtype=np.int64),
+        "by_inject_tick": np.zeros((modes, inject_ticks, len(OUTCOMES)), dtype=np.int64),
+        "disarm_tick": np.zeros(spec["max_ticks"] + 1, dtype=np.int64),
+        "battery_at_disarm": np.zeros(101, dtype=np.int64),
+    }
+
+
+def run_chunk(spec, runs, seed):
+    """Simulate ``runs`` runs and return their aggregated result."""
+    rng = np.random.default_rng(seed)
+    modes = list(spec["failures"])
+    weights = np.array([spec["failures"][mode] for mode in modes], dtype=np.float64)
+    mode = rng.choice(len(modes), size=runs, p=weights / weights.sum())
+    length = rng.integers(spec["mission_length"][0], spec["mission_length"][1], endpoint=True, size=runs)
+    inject_tick = rng.integers(spec["inject_tick"][0], spec["inject_tick"][1], endpoint=True, size=runs)
+
+    fleet = Fleet(runs)
+    no_coords = np.full(length.max(initial=0), np.nan)
+    for i, n in enumerate(length.tolist()):
+        fleet.set_mission(i, [{}] * n, no_coords[:n], no_coords[:n])
+        COMMANDS["arm"](fleet, i)
+        COMMANDS["takeoff"](fleet, i)
+
+    cause = np.zeros(runs, dtype=np.int8)
+    injected = np.zeros((runs, len(INJECTIONS)), dtype=bool)
+    disarm_tick = np.full(runs, -1, dtype=np.int64)
+    battery_at_disarm = np.zeros(runs, dtype=np.int64)
+    # First tick that ends with the battery empty; it only counts while airborne
+    empty_tick = np.maximum(fleet.battery.astype(np.int64), 1)
+
+    def record(tick, events):
+        for drones, reason in ((events.mission_complete, MISSION_COMPLETE), (events.failsafe, BATTERY_FAILSAFE)):
+            cause[drones[cause[drones] == NO_CAUSE]] = reason
+        disarm_tick[events.disarmed] = tick
+        battery_at_disarm[events.disarmed] = fleet.battery[events.disarmed]
+
+    scheduler = EventScheduler(fleet)
+    for tick in np.unique(inject_tick[inject_tick <= spec["max_ticks"]]).tolist():
+        scheduler.advance_to(tick, record)
+        drones = np.flatnonzero(inject_tick == tick)
+        scheduler.sync(drones)
+        for i in drones.tolist():
+            name = modes[mode[i]]
+            if name == "none":
+                continue
+            if disarm_tick[i] >= 0:
+                injected[i, AFTER_DISARM] = True  # the run is already over
+                continue
+            try:
+                COMMANDS["inject_failure"](fleet, i, {"mode": name})
+                injected[i, ACCEPTED] = True
+            except CommandError:
+                injected[i, REJECTED] = True
+                continue
+            if name == "motor_fail" and cause[i] == NO_CAUSE:
+                cause[i] = MOTOR_FAIL
+            if empty_tick[i] > tick:
+                empty_tick[i] = tick + max(int(fleet.battery[i]), 1)
+        scheduler.reschedule(drones)
+    scheduler.advance_to(spec["max_ticks"], record)
+
+    exhausted = empty_tick < np.where(disarm_tick < 0, spec["max_ticks"] + 1, disarm_tick)
+    outcome = np.where(disarm_tick < 0, TIMEOUT, np.where(exhausted, EXHAUSTED, SAFE))
+    landed = disarm_tick >= 0
+
+    result = empty_result(spec)
+    result["runs"] = runs
+    np.add.at(result["outcomes"], (mode, outcome), 1)
+    np.add.at(result["landing_causes"], (mode, cause), 1)
+    result["injections"] += np.stack([np.bincount(mode[injected[:, k]], minlength=len(modes)) for k in range(len(INJECTIONS))], axis=1)
+    np.add.at(result["by_mission_length"], (mode, length, outcome), 1)
+    np.add.at(result["by_inject_tick"], (mode, inject_tick, outcome), 1)
+    result["disarm_tick"] += np.bincount(disarm_tick[landed], minlength=spec["max_ticks"] + 1)
+    result["battery_at_disarm"] += np.bincount(battery_at_disarm[landed], minlength=101)
+    return result
+
+
+def merge(total, part):
+    for key, value in part.items():
+        total[key] = total[key] + value
+    return total
+
+
+def to_report(spec, result, done=False):
+    """JSON-ready view of an aggregated result; per-mode tables are keyed by failure mode."""
+    modes = list(spec["failures"])
+
+    def table(counts, labels, offset=0):
+        return {
+            mode: {str(k + offset): dict(zip(labels, row.tolist())) for k, row in enumerate(counts[m][offset:]) if row.any()}
+            for m, mode in enumerate(modes)
+        }
+
+    outcomes = result["outcomes"]
+    return {
+        "done": done,
+        "runs": result["runs"],
+        "outcomes": {mode: dict(zip(OUTCOMES, outcomes[m].tolist())) for m, mode in enumerate(modes)},
+        "safe_rate": {
+            mode: round(outcomes[m, SAFE] / outcomes[m].sum(), 6) if outcomes[m].sum() else None
+            for m, mode in enumerate(modes)
+        },
+        "landing_causes": {mode: dict(zip(LANDING_CAUSES, result["landing_causes"][m].tolist())) for m, mode in enumerate(modes)},
+        "injections": {mode: dict(zip(INJECTIONS, result["injections"][m].tolist())) for m, mode in enumerate(modes)},
+        "by_mission_length": table(result["by_mission_length"], OUTCOMES, spec["mission_length"][0]),
+        "by_inject_tick": table(result["by_inject_tick"], OUTCOMES, spec["inject_tick"][0]),
+        "disarm_tick": result["disarm_tick"].tolist(),
+        "battery_at_disarm": result["battery_at_disarm"].tolist(),
+    }
+
+
+def run_scenario(spec=None, workers=None):
+    """Yield the aggregated report after each completed chunk; the last one has ``done`` set."""
+    spec = load_spec(spec)
+    sizes = [min(spec["chunk_size"], spec["runs"] - start) for start in range(0, spec["runs"], spec["chunk_size"])]
+    seeds = np.random.SeedSequence(spec["seed"]).spawn(len(sizes))
+
+    total = empty_result(spec)
+    if workers == 1:
+        for k, (size, seed) in enumerate(zip(sizes, seeds)):
+            merge(total, run_chunk(spec, size, seed))
+            yield to_report(spec, total, done=k == len(sizes) - 1)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(run_chunk, spec, size, seed) for size, seed in zip(sizes, seeds)]
+        for k, future in enumerate(as_completed(futures)):
+            merge(total, future.result())
+            yield to_report(spec, total, done=k == len(futures) - 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo runs of missions with injected failures")
+    parser.add_argument("spec", nargs="?", help="JSON file overriding the default scenario spec")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    spec = None
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    try:
+        for report in run_scenario(spec, args.workers):
+            print(json.dumps(report), flush=True)
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,243 @@
+"""Multi-process serving: one simulation owner, many read-only HTTP workers.
+
+The owner process imports ``app``, runs the tick loop and mirrors every fleet
+snapshot into a shared memory segment (see ``shared_state``). Worker
+processes answer ``/status`` and ``/stream`` straight from that segment and
+forward every other request (commands, batches, fleet and clock changes,
+history, metrics) to the owner over a local authenticated connection, so the
+owner stays the single writer.
+
+Usage: python serve.py [--host H] [--port P] [--workers N] [--capacity DRONES]
+
+With gunicorn, start the owner with ``python serve.py --owner-only``, export
+the variables it prints and run ``gunicorn -w N 'serve:create_worker_app()'``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_cors import CORS
+
+from fleet import STATUS_FIELDS
+from shared_state import DEFAULT_CAPACITY, DroneRecordView, SharedFleet
+from telemetry_stream import telemetry_events
+
+# Response headers the WSGI server sets itself
+HOP_HEADERS = {"connection", "content-length", "transfer-encoding", "keep-alive", "date", "server"}
+
+# How often a worker's telemetry stream polls the segment for a new tick
+STREAM_POLL_SECONDS = 0.05
+
+
+def run_owner(shared, address, authkey, ready=None):
+    """Run the simulation and serve forwarded requests until the process is stopped."""
+    import app as sim
+
+    shared.header["boot_id"] = sim.BOOT_ID.encode()
+    with sim.sim_lock:
+        sim.snapshot_listeners.append(lambda view: shared.publish(view, sim.clock.ticks, sim.clock.sim_time))
+        sim.publish()
+
+    def serve_connection(conn):
+        client = sim.app.test_client()
+        with conn:
+            while True:
+                try:
+                    kind, *args = conn.recv()
+                except EOFError:
+                    return
+                if kind == "mission":
+                    drone_id, = args
+                    view = sim.snapshot
+                    reply = None
+                    if drone_id < view.size:
+                        reply = int(view.mission_version[drone_id]), view.missions[drone_id]
+                else:
+                    method, path, query, headers, body = args
+                    res = client.open(path, method=method, query_string=query, headers=headers, data=body)
+                    reply = res.status_code, list(res.headers.items()), res.get_data()
+                conn.send(reply)
+
+    listener = Listener(address, authkey=authkey)
+    if ready is not None:
+        ready.set()
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+
+
+class OwnerClient:
+    """Per-thread connections from a worker to the owner process."""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def call(self, *message):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send(message)
+            return conn.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise
+
+
+def create_worker_app(shared=None, address=None, authkey=None):
+    """Flask app of a read-only worker; arguments default to the GCS_* variables printed by the owner."""
+    shared = shared or SharedFleet.open(os.environ["GCS_SHM_NAME"])
+    address = address or os.environ["GCS_COMMAND_ADDRESS"]
+    authkey = authkey or bytes.fromhex(os.environ["GCS_COMMAND_AUTHKEY"])
+
+    owner = OwnerClient(address, authkey)
+    missions = {}  # drone id -> (mission_version, mission)
+
+    worker = Flask(__name__)
+    CORS(worker)
+    worker.url_map.redirect_defaults = False
+
+    def mission_of(drone_id, record):
+        if record["mission_len"][0] == 0:
+            return []
+        version = int(record["mission_version"][0])
+        cached = missions.get(drone_id)
+        if cached is None or cached[0] != version:
+            # The owner may already hold a newer mission; keep whichever it sends
+            cached = owner.call("mission", drone_id) or (version, [])
+            missions[drone_id] = cached
+        return cached[1]
+
+    def forward():
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_HEADERS | {"host"}]
+        status, headers, body = owner.call(
+            "http", request.method, request.path, request.query_string, headers, request.get_data(),
+        )
+        headers = [(k, v) for k, v in headers if k.lower() not in HOP_HEADERS]
+        return Response(body, status, headers)
+
+    @worker.route("/api/status", defaults={"drone_id": 0})
+    @worker.route("/api/drones/<int:drone_id>/status")
+    def get_status(drone_id):
+        fields = tuple(name for name in request.args.get("fields", "").split(",") if name)
+        unknown = [name for name in fields if name not in STATUS_FIELDS]
+        if unknown:
+            return jsonify({"message": f"Unknown status fields: {', '.join(unknown)}"}), 400
+
+        _, _, record = shared.read_drone(drone_id)
+        if record is None:
+            return forward()  # not mirrored: unknown drone or beyond the segment's capacity
+
+        data = DroneRecordView(record, mission_of(drone_id, record)).to_dict(0)
+        if fields:
+            data = {name: data[name] for name in fields}
+        version = int(record["version"][0])
+        response = Response(json.dumps(data, separators=(",", ":")), mimetype="application/json")
+        response.set_etag(f"{shared.boot_id}-{drone_id}-{version}" + "".join(f"+{name}" for name in fields))
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    @worker.route("/api/stream", defaults={"drone_id": 0})
+    @worker.route("/api/drones/<int:drone_id>/stream")
+    def stream_status(drone_id):
+        def read_drone(known_version):
+            _, _, record = shared.read_drone(drone_id)
+            if record is None:
+                return None
+            version = int(record["version"][0])
+            if version == known_version:
+                return version, None
+            return version, DroneRecordView(record, mission_of(drone_id, record)).to_dict(0)
+
+        def wait_past(ticks, timeout):
+            deadline = time.monotonic() + timeout
+            while shared.ticks() <= ticks and time.monotonic() < deadline:
+                time.sleep(STREAM_POLL_SECONDS)
+            return shared.ticks()
+
+        return Response(
+            stream_with_context(telemetry_events(read_drone, wait_past, shared.ticks())),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @worker.route("/", defaults={"path": ""}, methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+    @worker.route("/<path:path>", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+    def forward_to_owner(path):
+        return forward()
+
+    return worker
+
+
+def run_worker(sock, shared, address, authkey):
+    from werkzeug.serving import make_server
+
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, create_worker_app(shared, address, authkey), threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the simulation API from several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="drones mirrored into shared memory")
+    parser.add_argument("--owner-only", action="store_true", help="run only the owner, for workers started by gunicorn")
+    args = parser.parse_args()
+
+    # Children inherit the listening socket and the segment mapping, so they must be forked
+    ctx = multiprocessing.get_context("fork")
+    shared = SharedFleet.create(args.capacity)
+    address = os.path.join(tempfile.mkdtemp(prefix="gcs-"), "owner.sock")
+    authkey = secrets.token_bytes(16)
+    processes = []
+    try:
+        ready = ctx.Event()
+        owner = ctx.Process(target=run_owner, args=(shared, address, authkey, ready), name="gcs-owner")
+        owner.start()
+        processes.append(owner)
+        if not ready.wait(30):
+            raise RuntimeError("Simulation owner did not start")
+
+        if args.owner_only:
+            print(f"export GCS_SHM_NAME={shared.name}")
+            print(f"export GCS_COMMAND_ADDRESS={address}")
+            print(f"export GCS_COMMAND_AUTHKEY={authkey.hex()}", flush=True)
+        else:
+            sock = socket.create_server((args.host, args.port), backlog=1024)
+            for k in range(args.workers):
+                worker = ctx.Process(target=run_worker, args=(sock, shared, address, authkey), name=f"gcs-worker-{k}")
+                worker.start()
+                processes.append(worker)
+            sock.close()
+            print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers", flush=True)
+
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        while all(process.is_alive() for process in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        shared.close()
+        shared.shm.unlink()
+
+
+if __name__ == "__main__":
+    main()
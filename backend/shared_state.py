@@ -0,0 +1,166 @@
+"""Fleet telemetry published into shared memory for read-only worker processes.
+
+The segment is a 64-byte header followed by one fixed-size record per drone,
+``capacity`` records in total. The owner process rewrites it after every
+change under a seqlock: ``seq`` is odd while a write is in progress, so a
+reader copies what it needs and retries if ``seq`` was odd or moved in the
+meantime. Missions are variable length and not stored here; readers fetch
+them separately and cache them by ``mission_version``.
+"""
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from fleet import FleetView
+
+MAGIC = b"UAVSHM01"
+LAYOUT_VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("layout_version", "<u4"),
+    ("capacity", "<u4"),
+    ("seq", "<u8"),
+    ("size", "<u4"),
+    ("_pad", "<u4"),
+    ("ticks", "<u8"),
+    ("sim_time", "<f8"),
+    ("boot_id", "S8"),
+    ("_reserved", "V8"),
+])
+assert HEADER_DTYPE.itemsize == 64
+
+# 56-byte drone record, fields laid out on their natural alignment
+DRONE_DTYPE = np.dtype([
+    ("version", "<i8"),
+    ("mission_version", "<i8"),
+    ("lat", "<f8"),
+    ("lng", "<f8"),
+    ("altitude", "<i4"),
+    ("battery", "<i4"),
+    ("current_wp_index", "<i4"),
+    ("mission_len", "<i4"),
+    ("armed", "u1"),
+    ("gps_locked", "u1"),
+    ("state", "i1"),
+    ("flight_mode", "i1"),
+    ("_pad", "V4"),
+])
+assert DRONE_DTYPE.itemsize == 56
+
+DEFAULT_CAPACITY = 10000
+
+
+def segment_size(capacity):
+    return HEADER_DTYPE.itemsize + capacity * DRONE_DTYPE.itemsize
+
+
+def attach(name):
+    """Open an existing segment without letting this process unlink it on exit.
+
+    Processes forked from the creator should share its ``SharedFleet`` instead.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedFleet:
+    """Header and drone record views over a shared memory segment."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=shm.buf)
+        capacity = int(self.header["capacity"][0])
+        self.drones = np.ndarray(capacity, dtype=DRONE_DTYPE, buffer=shm.buf, offset=HEADER_DTYPE.itemsize)
+
+    @classmethod
+    def create(cls, capacity=DEFAULT_CAPACITY):
+        shm = shared_memory.SharedMemory(create=True, size=segment_size(capacity))
+        header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=shm.buf)
+        header[0] = np.zeros(1, dtype=HEADER_DTYPE)[0]
+        header["magic"] = MAGIC
+        header["layout_version"] = LAYOUT_VERSION
+        header["capacity"] = capacity
+        return cls(shm)
+
+    @classmethod
+    def open(cls, name):
+        shm = attach(name)
+        header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=shm.buf)
+        if header["magic"][0] != MAGIC or header["layout_version"][0] != LAYOUT_VERSION:
+            shm.close()
+            raise ValueError(f"{name} is not a fleet segment of layout {LAYOUT_VERSION}")
+        return cls(shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def capacity(self):
+        return len(self.drones)
+
+    @property
+    def boot_id(self):
+        return self.header["boot_id"][0].decode()
+
+    def close(self):
+        # Drop the views first, the buffer cannot be released while exported
+        self.header = self.drones = None
+        self.shm.close()
+
+    def publish(self, view, ticks, sim_time):
+        """Write a fleet snapshot; drones beyond ``capacity`` are left out. Single writer only.
+
+        A drone's version identifies its whole record, so only the records
+        whose version differs from the stored one are rewritten.
+        """
+        n = min(view.size, self.capacity)
+        stale = np.flatnonzero(self.drones["version"][:n] != view.version[:n])
+        header = self.header
+        header["seq"] += 1  # odd: write in progress
+        for name in DRONE_DTYPE.names:
+            if not name.startswith("_"):
+                self.drones[name][stale] = getattr(view, name)[stale]
+        header["size"] = n
+        header["ticks"] = ticks
+        header["sim_time"] = sim_time
+        header["seq"] += 1
+
+    def _read(self, copy):
+        """Run ``copy()`` until it sees a consistent segment."""
+        header = self.header
+        while True:
+            before = int(header["seq"][0])
+            if before % 2 == 0:
+                result = copy()
+                if int(header["seq"][0]) == before:
+                    return result
+            time.sleep(0)
+
+    def read_drone(self, drone_id):
+        """``(size, ticks, record)`` with a copy of the drone's record, or None for it if out of range."""
+        def copy():
+            size = int(self.header["size"][0])
+            record = self.drones[drone_id:drone_id + 1].copy() if drone_id < size else None
+            return size, int(self.header["ticks"][0]), record
+        return self._read(copy)
+
+    def ticks(self):
+        return int(self.header["ticks"][0])
+
+
+class DroneRecordView(FleetView):
+    """One shared memory drone record, formatted like the fleet it came from."""
+
+    size = 1
+
+    def __init__(self, record, mission):
+        for name in DRONE_DTYPE.names:
+            setattr(self, name, record[name])
+        self.missions = [mission]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+MODES = ("realtime", "accelerated", "manual")
+
+
+class SimClock:
+    """Virtual simulation clock driving the telemetry ticks.
+
+    ``realtime`` ticks every ``tick_period`` wall-clock seconds, ``accelerated``
+    ticks ``speed`` times faster, and ``manual`` only moves when ``advance`` is
+    called (e.g. from ``POST /api/sim/step``). Each tick moves simulated time
+    on by the ``tick_period`` in force at the time, so results do not depend
+    on wall-clock timing and changing the period never rewrites past time.
+    """
+
+    def __init__(self, mode="realtime", tick_period=5.0, speed=1.0):
+        self._cond = threading.Condition()
+        self.ticks = 0
+        self.sim_time = 0.0
+        self.mode = None
+        self.tick_period = None
+        self.speed = None
+        self.configure(mode, tick_period, speed)
+
+    @property
+    def interval(self):
+        """Wall-clock seconds between two ticks in the current mode."""
+        if self.mode == "accelerated":
+            return self.tick_period / self.speed
+        return self.tick_period
+
+    def configure(self, mode=None, tick_period=None, speed=None):
+        mode = self.mode if mode is None else mode
+        tick_period = self.tick_period if tick_period is None else float(tick_period)
+        speed = self.speed if speed is None else float(speed)
+
+        if mode not in MODES:
+            raise ValueError(f"Invalid clock mode: {mode}")
+        if tick_period <= 0:
+            raise ValueError("Tick period must be positive")
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+
+        with self._cond:
+            self.mode, self.tick_period, self.speed = mode, tick_period, speed
+            self._next_due = time.monotonic() + self.interval
+            self._cond.notify_all()
+
+    def wait_for_tick(self):
+        """Block until the next tick is due and return how late (s) it is. Never returns while in manual mode."""
+        with self._cond:
+            while True:
+                if self.mode == "manual":
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                if now >= self._next_due:
+                    lag = now - self._next_due
+                    # Catch up without bursting if we fell far behind
+                    self._next_due = max(self._next_due + self.interval, now)
+                    return lag
+                self._cond.wait(self._next_due - now)
+
+    def advance(self):
+        """Record that one tick has been simulated."""
+        with self._cond:
+            self.ticks += 1
+            self.sim_time += self.tick_period
+            self._cond.notify_all()
+
+    def wait_past(self, ticks, timeout=None):
+        """Block until the clock has moved beyond ``ticks``; returns the current tick count."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.ticks > ticks, timeout)
+            return self.ticks
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "tick_period": self.tick_period,
+            "speed": self.speed,
+            "ticks": self.ticks,
+            "sim_time": self.sim_time,
+        }
@@ -0,0 +1,102 @@
+import numpy as np
+
+# One history sample per drone per tick
+RECORD_DTYPE = np.dtype([
+    ("altitude", np.int16),
+    ("battery", np.int8),
+    ("state", np.uint8),
+    ("flight_mode", np.uint8),
+    ("current_wp_index", np.int32),
+    ("gps_locked", np.bool_),
+])
+
+
+class TelemetryHistory:
+    """Preallocated ring buffer of per-tick telemetry for drones ``0..drones-1``.
+
+    Row ``k`` of ``records`` holds every tracked drone at the tick stamped
+    ``timestamps[k]``; once ``capacity`` ticks are stored the oldest rows are
+    overwritten, so memory use is fixed at construction (see ``nbytes``).
+    """
+
+    def __init__(self, capacity, drones):
+        self.capacity = capacity
+        self.drones = drones
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.records = np.zeros((capacity, drones), dtype=RECORD_DTYPE)
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.records.nbytes
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def record(self, timestamp, fleet):
+        n = min(self.drones, fleet.size)
+        row = self.records[self.count % self.capacity]
+        row["altitude"][:n] = fleet.altitude[:n]
+        row["battery"][:n] = fleet.battery[:n]
+        row["state"][:n] = fleet.state[:n]
+        row["flight_mode"][:n] = fleet.flight_mode[:n]
+        row["current_wp_index"][:n] = fleet.current_wp_index[:n]
+        row["gps_locked"][:n] = fleet.gps_locked[:n]
+        row[n:] = 0
+        self.timestamps[self.count % self.capacity] = timestamp
+        self.count += 1
+
+    def query(self, drone_id, start=None, end=None):
+        """Chronological ``(timestamps, records)`` of one drone within ``[start, end]``."""
+        # Rows are filled before ``count`` moves past them, so read it once
+        count = self.count
+        size = min(count, self.capacity)
+        order = np.arange(count - size, count) % self.capacity
+        timestamps = self.timestamps[order]
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+        hi = size if end is None else np.searchsorted(timestamps, end, side="right")
+        rows = order[lo:hi]
+        return timestamps[lo:hi], self.records[rows, drone_id]
+
+
+def downsample_minmax(values, max_points):
+    """Indices of the min and max sample of ``max_points // 2`` equal buckets."""
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(max_points // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((values, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def downsample_lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets: indices of ``max_points`` visually significant samples."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])[:max_points]
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        nxt_hi = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = y[hi:nxt_hi].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
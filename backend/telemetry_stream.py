@@ -0,0 +1,44 @@
+import json
+
+# Full snapshot every N updates, keepalive comment when idle
+STREAM_SNAPSHOT_EVERY = 12
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def sse_event(event, data, event_id):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def telemetry_events(read_drone, wait_past, ticks):
+    """Server-sent events for one drone: a snapshot first, then per-tick deltas of changed fields.
+
+    ``read_drone(known_version)`` returns the drone's ``(version, status dict)``,
+    with the dict left as None while the version equals ``known_version``, or
+    None once the drone no longer exists. ``wait_past(ticks, timeout)`` blocks
+    until the simulation moves beyond ``ticks`` and returns the tick count.
+    """
+    last = None
+    last_version = None
+    updates = 0
+    while True:
+        current = read_drone(last_version)
+        if current is None:
+            break
+        version, data = current
+        current = last if data is None else data
+        last_version = version
+        if last is None or updates % STREAM_SNAPSHOT_EVERY == 0:
+            yield sse_event("snapshot", current, ticks)
+        else:
+            delta = {k: v for k, v in current.items() if v != last[k]}
+            if delta:
+                yield sse_event("delta", delta, ticks)
+        last = current
+        updates += 1
+
+        while True:
+            latest = wait_past(ticks, STREAM_KEEPALIVE_SECONDS)
+            if latest != ticks:
+                ticks = latest
+                break
+            yield ": keepalive\n\n"
@@ -0,0 +1,37 @@
+import os
+import socket
+import sys
+import threading
+
+import pytest
+import requests
+
+API_URL = "http://localhost:5000/api"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def server_running():
+    try:
+        socket.create_connection(("localhost", 5000), timeout=0.5).close()
+        return True
+    except OSError:
+        return False
+
+
+@pytest.fixture(scope="session", autouse=True)
+def sim_server():
+    """Serve the app on port 5000 unless one is already up, and step its clock manually."""
+    server = None
+    if not server_running():
+        os.environ.setdefault("SIM_CLOCK_MODE", "manual")
+        from werkzeug.serving import make_server
+        import app
+
+        server = make_server("localhost", 5000, app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    requests.post(f"{API_URL}/sim/clock", json={"mode": "manual"})
+    yield
+    if server is not None:
+        server.shutdown()
@@ -0,0 +1,94 @@
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/fleet", json={"size": 3})
+    for drone_id in range(3):
+        requests.post(f"{API_URL}/drones/{drone_id}/reset")
+
+def status(drone_id):
+    return requests.get(f"{API_URL}/drones/{drone_id}/status").json()
+
+def test_batch_runs_commands_in_order():
+    reset()
+    res = requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "arm", "drone_id": 1},
+        {"command": "takeoff", "drone_id": 1},
+        {"command": "mission", "drone_id": 1, "waypoints": ["WP1", "WP2"], "seed": 1},
+    ]})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["ok"] and body["committed"]
+    assert [r["status"] for r in body["results"]] == [200, 200, 200]
+    assert status(1)["state"] == "flying"
+    assert len(status(1)["mission"]) == 2
+
+def test_atomic_batch_rolls_back_on_failure():
+    reset()
+    before = status(0)
+    res = requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "arm", "drone_id": 0},
+        {"command": "mission", "drone_id": 0, "waypoints": ["WP1"]},
+        {"command": "land", "drone_id": 0},  # not flying
+        {"command": "arm", "drone_id": 2},
+    ]})
+    assert res.status_code == 400
+    body = res.json()
+    assert not body["ok"] and not body["committed"]
+    assert [r["status"] for r in body["results"]] == [200, 200, 400, None]
+    assert status(0) == before
+    assert status(2)["state"] == "disarmed"
+
+def test_rolled_back_batch_keeps_etag_unchanged():
+    reset()
+    etag = requests.get(f"{API_URL}/drones/0/status").headers["ETag"]
+    requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "arm", "drone_id": 0},
+        {"command": "land", "drone_id": 0},
+    ]})
+    res = requests.get(f"{API_URL}/drones/0/status", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+def test_non_atomic_batch_keeps_successful_commands():
+    reset()
+    res = requests.post(f"{API_URL}/batch", json={"atomic": False, "commands": [
+        {"command": "arm", "drone_id": 0},
+        {"command": "land", "drone_id": 0},
+        {"command": "arm", "drone_id": 1},
+    ]})
+    assert res.status_code == 400
+    body = res.json()
+    assert body["committed"]
+    assert [r["status"] for r in body["results"]] == [200, 400, 200]
+    assert status(0)["state"] == "armed"
+    assert status(1)["state"] == "armed"
+
+def test_non_atomic_batch_can_stop_on_error():
+    reset()
+    res = requests.post(f"{API_URL}/batch", json={"atomic": False, "stop_on_error": True, "commands": [
+        {"command": "land", "drone_id": 0},
+        {"command": "arm", "drone_id": 1},
+    ]})
+    assert [r["status"] for r in res.json()["results"]] == [400, None]
+    assert status(1)["state"] == "disarmed"
+
+def test_batch_rejects_unknown_commands_and_drones():
+    reset()
+    res = requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "fly_away", "drone_id": 0},
+    ]})
+    assert res.json()["results"][0]["status"] == 400
+    res = requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "arm", "drone_id": 99},
+    ]})
+    assert res.json()["results"][0]["status"] == 404
+    res = requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": ["arm"], "drone_id": 0},
+    ]})
+    assert res.status_code == 400
+    assert res.json()["results"][0]["status"] == 400
+
+def test_batch_requires_command_list():
+    res = requests.post(f"{API_URL}/batch", json={"commands": "arm"})
+    assert res.status_code == 400
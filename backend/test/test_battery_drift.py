@@ -1,11 +1,13 @@
 import requests
-import time
 
 API_URL = "http://localhost:5000/api"
 
 def reset():
     requests.post(f"{API_URL}/reset")
 
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
 def get_status():
     return requests.get(f"{API_URL}/status").json()
 
@@ -17,7 +19,7 @@ def test_battery_drains_over_time():
 
     initial = get_status()["battery"]
 
-    time.sleep(7)  # Wait a bit more than 5s for sure
+    step()
 
     new = get_status()["battery"]
 
@@ -31,7 +33,7 @@ def test_auto_land_when_battery_critically_low():
     requests.post(f"{API_URL}/arm")
     requests.post(f"{API_URL}/takeoff")
 
-    time.sleep(6)  # Wait for telemetry loop to drop to 5% and trigger landing
+    step()  # Let telemetry drop to 5% and trigger landing
 
     status = get_status()
     assert status["state"] in ["landing", "disarmed"]
@@ -46,14 +48,13 @@ def test_drone_lands_and_disarms_on_zero_battery():
     requests.post(f"{API_URL}/takeoff")
 
     # THEN inject battery failure mid-flight
-    time.sleep(1)  # give it time to take off
     requests.post(f"{API_URL}/inject_failure", json={"mode": "low_battery"})
 
     # Now observe landing + disarm over time
-    for i in range(20):  # up to 100s
-        time.sleep(5)
+    for i in range(20):  # up to 20 ticks
+        step()
         status = get_status()
-        print(f"[TEST] {i*5}s → Battery={status['battery']}, Alt={status['altitude']}, State={status['state']}, Armed={status['armed']}")
+        print(f"[TEST] tick {i + 1} → Battery={status['battery']}, Alt={status['altitude']}, State={status['state']}, Armed={status['armed']}")
         
         if status["battery"] <= 0 and status["state"] == "disarmed":
             assert not status["armed"]
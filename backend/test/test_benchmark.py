@@ -0,0 +1,25 @@
+from benchmark import compare, run_benchmarks
+
+def test_quick_benchmark_reports_every_metric():
+    results = run_benchmarks(quick=True)
+    assert results["status_inprocess"]["full"]["rps"] > 0
+    assert results["status_inprocess"]["not_modified"]["p99_ms"] > 0
+    assert results["status_http"]["errors"] == 0
+    assert results["status_http"]["clients"] == 4
+    assert [r["waypoints"] for r in results["upload_mission"]] == [10, 100]
+    assert [r["drones"] for r in results["tick"]] == [1, 100]
+    assert [r["drones"] for r in results["scheduler"]] == [100]
+    assert [r["drones"] for r in results["command"]] == [100]
+
+def test_compare_flags_slower_metrics():
+    baseline = {
+        "status_http": {"rps": 1000.0, "p50_ms": 1.0},
+        "tick": [{"drones": 100, "p50_ms": 0.1}],
+    }
+    results = {
+        "status_http": {"rps": 500.0, "p50_ms": 1.1},
+        "tick": [{"drones": 100, "p50_ms": 0.2}],
+    }
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert {r["metric"] for r in regressions} == {"status_http.rps", "tick[100].p50_ms"}
+    assert compare(baseline, baseline, tolerance=0.25) == []
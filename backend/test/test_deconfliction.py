@@ -0,0 +1,192 @@
+import numpy as np
+import pytest
+import requests
+
+from commands import COMMANDS, MissionConflict, prepare
+from deconfliction import Deconfliction, project, segment_distance
+from fleet import DISARMED, Fleet, FLYING
+from geo import haversine_km, sample_in_radius
+
+API_URL = "http://localhost:5000/api"
+HOME = (51.0447, -114.0719)
+
+def scattered_fleet(size, seed=0):
+    rng = np.random.default_rng(seed)
+    fleet = Fleet(size, home=HOME)
+    fleet.lat[:], fleet.lng[:] = sample_in_radius(size, *HOME, 0.5, rng)
+    fleet.state[:] = FLYING
+    fleet.altitude[:] = rng.integers(0, 120, size)
+    return fleet
+
+def test_drone_conflicts_match_all_pairs():
+    fleet = scattered_fleet(800)
+    losses = Deconfliction(horizontal_m=40, vertical_m=20).drone_conflicts(fleet)
+
+    airborne = np.flatnonzero(fleet.altitude > 0)
+    i, j = np.triu_indices(len(airborne), k=1)
+    a, b = airborne[i], airborne[j]
+    horizontal = haversine_km(fleet.lat[a], fleet.lng[a], fleet.lat[b], fleet.lng[b]) * 1000
+    vertical = np.abs(fleet.altitude[a] - fleet.altitude[b])
+    close = (horizontal < 40) & (vertical < 20)
+
+    assert losses.complete
+    assert len(losses.drones) > 0
+    assert sorted(map(tuple, losses.drones.tolist())) == sorted(zip(a[close].tolist(), b[close].tolist()))
+
+def test_drones_on_the_ground_never_conflict():
+    fleet = Fleet(3, home=HOME)
+    fleet.state[:2] = FLYING
+    fleet.altitude[:2] = 10
+    assert Deconfliction().drone_conflicts(fleet).drones.tolist() == [[0, 1]]
+    fleet.altitude[1] = 0
+    assert len(Deconfliction().drone_conflicts(fleet).drones) == 0
+
+def test_segment_distance():
+    p = np.array([[0, 0, 10, 0], [0, 0, 10, 0], [0, 0, 0, 0]], dtype=float)
+    q = np.array([[5, -5, 5, 5], [0, 3, 10, 3], [3, 4, 3, 4]], dtype=float)
+    np.testing.assert_allclose(segment_distance(p, q), [0, 3, 5])
+
+def mission(fleet, drone_id, points):
+    return COMMANDS["mission"](fleet, drone_id, {"waypoints": [{"name": f"WP{k}", "lat": lat, "lng": lng} for k, (lat, lng) in enumerate(points)]})
+
+def offset(north_m, east_m):
+    x, y = project(HOME[0], HOME[1], HOME[0])
+    lat = np.degrees((y + north_m) / 6371000)
+    lng = np.degrees((x + east_m) / (6371000 * np.cos(np.radians(HOME[0]))))
+    return float(lat), float(lng)
+
+def test_crossing_mission_is_rejected():
+    fleet = Fleet(3, home=HOME, deconfliction=Deconfliction(horizontal_m=50, check_missions=True))
+    mission(fleet, 0, [offset(-500, 0), offset(500, 0)])
+    COMMANDS["arm"](fleet, 0)
+
+    with pytest.raises(MissionConflict, match="drones 0") as rejected:
+        mission(fleet, 1, [offset(0, -500), offset(0, 500)])
+    assert rejected.value.status == 409
+    assert fleet.mission_len[1] == 0
+
+    # A parallel leg 60 m away keeps separation
+    mission(fleet, 2, [offset(-500, 60), offset(500, 60)])
+    assert fleet.mission_len[2] == 2
+
+def test_mission_conflicts_match_all_leg_pairs():
+    rng = np.random.default_rng(3)
+    deconfliction = Deconfliction(horizontal_m=30, check_missions=True)
+    fleet = Fleet(41, home=HOME)
+    for i in range(40):
+        lat, lng = sample_in_radius(3, *HOME, 2, rng)
+        mission(fleet, i, zip(lat.tolist(), lng.tolist()))
+        COMMANDS["arm"](fleet, i)
+    lat, lng = sample_in_radius(4, *HOME, 2, rng)
+
+    def segments(lat, lng):
+        x, y = project(lat, lng, HOME[0])
+        return np.stack([x[:-1], y[:-1], x[1:], y[1:]], axis=1)
+
+    new = segments(lat, lng)
+    expected = [
+        i for i in range(40)
+        if any(segment_distance(new, np.repeat(leg[None], len(new), axis=0)).min() < 30 for leg in segments(*fleet.mission_coords(i)))
+    ]
+    assert 0 < len(expected) < 40
+    assert deconfliction.mission_conflicts(fleet, 40, lat, lng) == expected
+
+def test_missions_of_idle_drones_are_not_checked():
+    fleet = Fleet(2, home=HOME, deconfliction=Deconfliction(check_missions=True))
+    mission(fleet, 0, [offset(-500, 0), offset(500, 0)])
+    mission(fleet, 1, [offset(0, -500), offset(0, 500)])
+    assert fleet.mission_len.tolist() == [2, 2]
+
+def test_mission_checks_are_off_by_default():
+    fleet = Fleet(2, home=HOME, deconfliction=Deconfliction())
+    mission(fleet, 0, [offset(-500, 0), offset(500, 0)])
+    COMMANDS["arm"](fleet, 0)
+    mission(fleet, 1, [offset(0, -500), offset(0, 500)])
+    assert fleet.mission_len.tolist() == [2, 2]
+
+def test_plan_from_snapshot_is_rechecked_against_later_changes():
+    fleet = Fleet(3, home=HOME, deconfliction=Deconfliction(check_missions=True))
+    crossing = {"waypoints": [{"lat": lat, "lng": lng} for lat, lng in (offset(0, -500), offset(0, 500))]}
+    assign = prepare("mission", fleet.snapshot(), 1, crossing)
+
+    # Drone 0 arms with a crossing mission after the plan was checked
+    mission(fleet, 0, [offset(-500, 0), offset(500, 0)])
+    COMMANDS["arm"](fleet, 0)
+    with pytest.raises(MissionConflict, match="drones 0"):
+        assign(fleet, 1, crossing)
+    assert fleet.mission_len[1] == 0
+    with pytest.raises(MissionConflict):
+        prepare("mission", fleet.snapshot(), 2, crossing)(fleet, 2, crossing)
+
+def test_remaining_legs_of_some_drones():
+    fleet = Fleet(3, home=HOME)
+    for drone_id in (0, 2):
+        mission(fleet, drone_id, [offset(-500, 0), offset(500, 0)])
+        COMMANDS["arm"](fleet, drone_id)
+    owner, lat, lng = Deconfliction().remaining_legs(fleet, drones=np.array([2]))
+    assert owner.tolist() == [2, 2]
+    assert list(zip(lat, lng)) == list(zip(*fleet.mission_coords(2)))
+
+def test_plan_is_rechecked_against_a_drone_rearmed_after_landing():
+    fleet = Fleet(3, home=HOME, deconfliction=Deconfliction(check_missions=True))
+    mission(fleet, 0, [offset(-500, 0), offset(500, 0)])
+    COMMANDS["arm"](fleet, 0)
+    COMMANDS["takeoff"](fleet, 0)
+    fleet.tick()
+    COMMANDS["land"](fleet, 0)
+    crossing = {"waypoints": [{"lat": lat, "lng": lng} for lat, lng in (offset(0, -500), offset(0, 500))]}
+    assign = prepare("mission", fleet.snapshot(), 1, crossing)
+
+    # Drone 0 touches down and is re-armed with the same mission
+    while fleet.state[0] != DISARMED:
+        fleet.tick()
+    COMMANDS["arm"](fleet, 0)
+    with pytest.raises(MissionConflict, match="drones 0"):
+        assign(fleet, 1, crossing)
+    assert fleet.mission_len[1] == 0
+
+def test_upload_conflicting_mission_returns_409():
+    import app as sim
+
+    client = sim.app.test_client()
+    client.post("/api/fleet", json={"size": 3})
+    for drone_id in range(3):
+        client.post(f"/api/drones/{drone_id}/reset")
+    route = [{"name": "A", "lat": offset(-500, 0)[0], "lng": offset(-500, 0)[1]},
+             {"name": "B", "lat": offset(500, 0)[0], "lng": offset(500, 0)[1]}]
+    crossing = [{"name": "C", "lat": offset(0, -500)[0], "lng": offset(0, -500)[1]},
+                {"name": "D", "lat": offset(0, 500)[0], "lng": offset(0, 500)[1]}]
+    try:
+        assert client.post("/api/drones/0/mission", json={"waypoints": route}).status_code == 200
+        client.post("/api/drones/0/arm")
+        client.post("/api/drones/0/takeoff")
+        # Off unless GCS_MISSION_DECONFLICTION=1
+        assert client.post("/api/drones/2/mission", json={"waypoints": crossing}).status_code == 200
+
+        sim.deconfliction.check_missions = True
+        res = client.post("/api/drones/1/mission", json={"waypoints": crossing})
+        assert res.status_code == 409
+        assert "conflicts" in res.get_json()["message"]
+        assert client.get("/api/drones/1/status").get_json()["mission"] == []
+    finally:
+        sim.deconfliction.check_missions = False
+        for drone_id in range(3):
+            client.post(f"/api/drones/{drone_id}/reset")
+        client.post("/api/fleet", json={"size": 1})
+
+def test_conflicts_endpoint_reports_close_drones():
+    requests.post(f"{API_URL}/fleet", json={"size": 3})
+    for drone_id in range(3):
+        requests.post(f"{API_URL}/drones/{drone_id}/reset")
+    for drone_id in (0, 2):
+        requests.post(f"{API_URL}/drones/{drone_id}/arm")
+        requests.post(f"{API_URL}/drones/{drone_id}/takeoff")
+    requests.post(f"{API_URL}/sim/step")
+
+    data = requests.get(f"{API_URL}/conflicts").json()
+    assert data["separation"]["horizontal_m"] > 0
+    assert [c["drones"] for c in data["conflicts"]] == [[0, 2]]
+
+    for drone_id in range(3):
+        requests.post(f"{API_URL}/drones/{drone_id}/reset")
+    requests.post(f"{API_URL}/fleet", json={"size": 1})
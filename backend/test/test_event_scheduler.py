@@ -0,0 +1,174 @@
+import numpy as np
+import pytest
+
+from commands import COMMANDS, CommandError
+from event_scheduler import EventScheduler
+from fleet import FIELDS, Fleet
+from geofence import Geofence, GeofenceIndex
+
+HOME = (51.0447, -114.0719)
+COMMAND_CHOICES = [
+    ("arm", {}), ("takeoff", {}), ("land", {}), ("clear_mission", {}), ("reset", {}),
+    ("inject_failure", {"mode": "low_battery"}), ("inject_failure", {"mode": "motor_fail"}),
+    ("inject_failure", {"mode": "reset"}),
+]
+
+def square(lat, lng, half_size):
+    return [
+        [lat - half_size, lng - half_size],
+        [lat - half_size, lng + half_size],
+        [lat + half_size, lng + half_size],
+        [lat + half_size, lng - half_size],
+    ]
+
+def build_fleet(size, seed):
+    rng = np.random.default_rng(seed)
+    fleet = Fleet(size, home=HOME)
+    for i in range(size):
+        length = int(rng.integers(0, 40))
+        if length:
+            COMMANDS["mission"](fleet, i, {"waypoints": [f"WP{k}" for k in range(length)], "seed": i})
+        if rng.random() < 0.8:
+            COMMANDS["arm"](fleet, i)
+        if rng.random() < 0.7:
+            try:
+                COMMANDS["takeoff"](fleet, i)
+            except CommandError:
+                pass
+    return fleet
+
+def random_commands(size, ticks, count, seed):
+    rng = np.random.default_rng(seed)
+    commands = []
+    for _ in range(count):
+        tick = int(rng.integers(0, ticks))
+        drone = int(rng.integers(0, size))
+        if rng.random() < 0.15:
+            params = {"waypoints": [f"WP{k}" for k in range(int(rng.integers(1, 30)))], "seed": int(rng.integers(1000))}
+            commands.append((tick, drone, "mission", params))
+        else:
+            name, params = COMMAND_CHOICES[rng.integers(len(COMMAND_CHOICES))]
+            commands.append((tick, drone, name, params))
+    return sorted(commands, key=lambda command: command[0])
+
+def apply(fleet, drone, name, params):
+    try:
+        COMMANDS[name](fleet, drone, params)
+    except CommandError:
+        pass
+
+def columns(fleet):
+    # Version numbers depend on how often drones were touched, not on their state
+    return {name: getattr(fleet, name).copy() for name in FIELDS if name != "mission_version"}
+
+def assert_same_columns(expected, fleet):
+    for name, column in expected.items():
+        np.testing.assert_array_equal(getattr(fleet, name), column, err_msg=name)
+
+def record(log, tick, events):
+    for kind, drones in events._asdict().items():
+        log.setdefault(tick, {}).setdefault(kind, set()).update(drones.tolist())
+
+def cleaned(log):
+    return {tick: {kind: drones for kind, drones in kinds.items() if drones} for tick, kinds in log.items() if any(kinds.values())}
+
+def fence_index(fleet, kind):
+    fences = GeofenceIndex()
+    for drone in range(0, fleet.size, 7):
+        lat, lng = fleet.mission_coords(drone)
+        if len(lat) > 3:
+            fences.add(Geofence(f"{kind}-{drone}", "exclusion", square(lat[3], lng[3], 0.002)))
+    if kind == "inclusion":
+        fences.add(Geofence("area", "inclusion", square(*HOME, 0.015)))
+    return fences
+
+@pytest.mark.parametrize("seed, fences", [(0, None), (1, "exclusion"), (2, "inclusion")])
+def test_scheduler_matches_fixed_ticks(seed, fences):
+    size, ticks = 60, 150
+    commands = random_commands(size, ticks, 120, seed)
+
+    reference = build_fleet(size, seed)
+    geofences = fence_index(reference, fences) if fences else None
+    expected_events, expected_columns = {}, {}
+    pending = list(commands)
+    for tick in range(ticks + 1):
+        while pending and pending[0][0] == tick:
+            _, drone, name, params = pending.pop(0)
+            apply(reference, drone, name, params)
+        expected_columns[tick] = columns(reference)
+        record(expected_events, tick + 1, reference.tick(geofences))
+
+    fleet = build_fleet(size, seed)
+    scheduler = EventScheduler(fleet, geofences)
+    events = {}
+    for tick in sorted({command[0] for command in commands}):
+        scheduler.advance_to(tick, lambda due, batch: record(events, due, batch))
+        for _, drone, name, params in (command for command in commands if command[0] == tick):
+            scheduler.sync(drone)
+            apply(fleet, drone, name, params)
+            scheduler.reschedule(drone)
+        scheduler.sync()
+        assert_same_columns(expected_columns[tick], fleet)
+    scheduler.advance_to(ticks + 1, lambda due, batch: record(events, due, batch))
+    scheduler.sync()
+
+    assert_same_columns(columns(reference), fleet)
+    assert cleaned(events) == cleaned(expected_events)
+
+def test_idle_fleet_has_no_events():
+    fleet = Fleet(1000, home=HOME)
+    scheduler = EventScheduler(fleet)
+    assert len(scheduler) == 0
+    scheduler.advance_to(10000)
+    scheduler.sync()
+    assert (fleet.battery == 100).all()
+
+def test_cruising_drone_is_only_woken_for_its_events():
+    fleet = Fleet(1, home=HOME)
+    COMMANDS["mission"](fleet, 0, {"waypoints": [f"WP{k}" for k in range(50)], "seed": 1})
+    COMMANDS["arm"](fleet, 0)
+    COMMANDS["takeoff"](fleet, 0)
+    scheduler = EventScheduler(fleet)
+
+    wakeups = []
+    scheduler.advance_to(500, lambda due, events: wakeups.append((due, events.mission_complete.tolist(), events.disarmed.tolist())))
+    # Mission completes after 50 waypoints, then it descends from 110 m at 5 m per tick
+    assert wakeups == [(50, [0], []), (72, [], [0])]
+    assert fleet.to_dict(0)["state"] == "disarmed"
+
+def test_server_ticks_match_fixed_ticks():
+    import app as sim
+
+    client = sim.app.test_client()
+    reference = Fleet(4, home=(sim.app.config["BASE_LAT"], sim.app.config["BASE_LNG"]))
+
+    def command(drone, name, **params):
+        client.post(f"/api/drones/{drone}/{name}", json=params)
+        apply(reference, drone, name, params)
+
+    def step(ticks):
+        client.post("/api/sim/step", json={"ticks": ticks})
+        for _ in range(ticks):
+            reference.tick(sim.geofences)
+        for drone in range(4):
+            assert client.get(f"/api/drones/{drone}/status").get_json() == reference.to_dict(drone)
+
+    client.post("/api/fleet", json={"size": 4})
+    for drone in range(4):
+        client.post(f"/api/drones/{drone}/reset")
+    try:
+        command(0, "mission", waypoints=[f"WP{k}" for k in range(30)], seed=1)
+        command(3, "mission", waypoints=[f"WP{k}" for k in range(30)], seed=2)
+        for drone in (0, 1, 3):
+            command(drone, "arm")
+            command(drone, "takeoff")
+        command(2, "arm")
+        step(4)
+        command(3, "inject_failure", mode="low_battery")
+        step(7)
+        command(1, "land")
+        step(40)
+        assert reference.counts()["disarmed"] == 4
+    finally:
+        client.post("/api/fleet", json={"size": 1})
+        client.post("/api/reset")
@@ -0,0 +1,41 @@
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/fleet", json={"size": 3})
+    for drone_id in range(3):
+        requests.post(f"{API_URL}/drones/{drone_id}/reset")
+
+def test_resize_fleet():
+    reset()
+    res = requests.get(f"{API_URL}/fleet")
+    assert res.status_code == 200
+    assert res.json()["size"] == 3
+    assert res.json()["states"]["disarmed"] == 3
+
+def test_resize_fleet_rejects_invalid_size():
+    res = requests.post(f"{API_URL}/fleet", json={"size": 0})
+    assert res.status_code == 400
+
+def test_resize_fleet_rejects_huge_size():
+    res = requests.post(f"{API_URL}/fleet", json={"size": 10 ** 10})
+    assert res.status_code == 400
+    assert "at most" in res.json()["message"]
+
+def test_drones_are_independent():
+    reset()
+    assert requests.post(f"{API_URL}/drones/2/arm").status_code == 200
+    assert requests.get(f"{API_URL}/drones/2/status").json()["state"] == "armed"
+    assert requests.get(f"{API_URL}/drones/1/status").json()["state"] == "disarmed"
+
+def test_legacy_routes_target_drone_zero():
+    reset()
+    assert requests.post(f"{API_URL}/arm").status_code == 200
+    assert requests.get(f"{API_URL}/drones/0/status").json()["armed"]
+
+def test_unknown_drone():
+    reset()
+    res = requests.post(f"{API_URL}/drones/99/arm")
+    assert res.status_code == 404
+    assert "unknown drone" in res.json()["message"].lower()
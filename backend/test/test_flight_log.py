@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from commands import COMMANDS, CommandError
+from fleet import Fleet
+from flight_log import FlightRecorder, open_log, replay
+
+HOME = (51.0447, -114.0719)
+
+class Session:
+    """Drives a fleet the way app.py does while recording a flight log."""
+
+    def __init__(self, path, size=2):
+        self.fleet = Fleet(size, home=HOME)
+        self.ticks = 0
+        self.log = FlightRecorder(path, 5.0, HOME)
+        self.log.start(self.ticks, self.fleet)
+
+    def command(self, name, drone_id=0, **params):
+        try:
+            COMMANDS[name](self.fleet, drone_id, params)
+            ok = True
+        except CommandError:
+            ok = False
+        self.log.command(self.ticks, name, drone_id, self.fleet, ok, params)
+        return ok
+
+    def step(self, ticks=1):
+        for _ in range(ticks):
+            events = self.fleet.tick()
+            self.ticks += 1
+            self.log.tick(self.ticks, self.fleet, events)
+
+def record_flight(path):
+    session = Session(path)
+    session.command("mission", 0, waypoints=["WP1", "WP2", "WP3"], seed=7)
+    session.command("arm", 0)
+    session.command("takeoff", 0)
+    session.command("arm", 1)
+    session.step(2)
+    session.command("inject_failure", 1, mode="low_battery")
+    session.command("arm", 1)  # rejected: battery too low
+    session.command("inject_failure", 0, mode="low_battery")
+    session.step(10)
+    session.log.close()
+    return session
+
+def test_log_is_fixed_size_records(tmp_path):
+    path = tmp_path / "flight.bin"
+    record_flight(path)
+    header, records = open_log(path)
+    assert header["magic"] == b"UAVFLOG1"
+    assert records.dtype.itemsize == 48
+    assert path.stat().st_size == 48 * (len(records) + 1)
+
+def test_log_has_one_writer(tmp_path):
+    path = tmp_path / "flight.bin"
+    recorder = FlightRecorder(path, 5.0, HOME)
+    with pytest.raises(RuntimeError):
+        FlightRecorder(path, 5.0, HOME)
+    recorder.close()
+    FlightRecorder(path, 5.0, HOME).close()
+    header, records = open_log(path)
+    assert header["magic"] == b"UAVFLOG1"
+    assert len(records) == 0
+
+def test_replay_matches_recording(tmp_path):
+    path = tmp_path / "flight.bin"
+    session = record_flight(path)
+    result = replay(path)
+    assert result.mismatch_count == 0, result.mismatches
+    assert result.ticks == session.ticks
+
+def test_replay_detects_divergence(tmp_path):
+    path = tmp_path / "flight.bin"
+    record_flight(path)
+    _, records = open_log(path)
+    tampered = np.array(records)
+    tick_records = np.flatnonzero(tampered["event"] == 2)
+    # Drop one tick: every later transition should now differ
+    tampered = np.delete(tampered, tick_records[3])
+    with open(path, "r+b") as f:
+        f.seek(48)
+        f.write(tampered.tobytes())
+        f.truncate()
+
+    assert replay(path).mismatch_count > 0
+
+def test_replay_day_long_log_quickly(tmp_path):
+    path = tmp_path / "day.bin"
+    session = Session(path, size=1)
+    for _ in range(20):
+        session.command("reset", 0)
+        session.command("mission", 0, waypoints=[f"WP{i}" for i in range(200)], seed=1)
+        session.command("arm", 0)
+        session.command("takeoff", 0)
+        session.step(864)  # 20 x 864 ticks of 5 s = 24 h
+    session.log.close()
+
+    result = replay(path)
+    assert result.ticks == 17280
+    assert result.mismatch_count == 0, result.mismatches
+    assert result.elapsed < 10
@@ -0,0 +1,123 @@
+import numpy as np
+import requests
+
+from geofence import Geofence, GeofenceIndex
+
+API_URL = "http://localhost:5000/api"
+
+BASE_LAT, BASE_LNG = 51.0447, -114.0719
+
+def reset():
+    requests.post(f"{API_URL}/reset")
+    for zone in requests.get(f"{API_URL}/geofences").json()["geofences"]:
+        requests.delete(f"{API_URL}/geofences/{zone['name']}")
+
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
+def get_status():
+    return requests.get(f"{API_URL}/status").json()
+
+def square(lat, lng, half_size=0.001):
+    return [
+        [lat - half_size, lng - half_size],
+        [lat - half_size, lng + half_size],
+        [lat + half_size, lng + half_size],
+        [lat + half_size, lng - half_size],
+    ]
+
+def fly_mission(waypoints):
+    requests.post(f"{API_URL}/mission", json={"waypoints": waypoints})
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+
+def test_upload_and_delete_geofence():
+    reset()
+    res = requests.post(f"{API_URL}/geofences", json={
+        "name": "stadium", "kind": "exclusion", "points": square(BASE_LAT, BASE_LNG),
+    })
+    assert res.status_code == 200
+    zones = requests.get(f"{API_URL}/geofences").json()["geofences"]
+    assert [zone["name"] for zone in zones] == ["stadium"]
+
+    assert requests.delete(f"{API_URL}/geofences/stadium").status_code == 200
+    assert requests.delete(f"{API_URL}/geofences/stadium").status_code == 404
+
+def test_invalid_geofence():
+    reset()
+    res = requests.post(f"{API_URL}/geofences", json={
+        "name": "line", "kind": "exclusion", "points": [[51.0, -114.0], [51.1, -114.0]],
+    })
+    assert res.status_code == 400
+    res = requests.post(f"{API_URL}/geofences", json={
+        "name": "zone", "kind": "sideways", "points": square(BASE_LAT, BASE_LNG),
+    })
+    assert res.status_code == 400
+    res = requests.post(f"{API_URL}/geofences", json={
+        "name": "zone", "kind": "inclusion", "points": square(BASE_LAT, BASE_LNG, 100),
+    })
+    assert res.status_code == 400
+
+def test_large_zones_are_checked_without_the_grid():
+    index = GeofenceIndex()
+    index.add(Geofence("province", "inclusion", square(BASE_LAT, BASE_LNG, 5.5)))
+    index.add(Geofence("world", "exclusion", [[-89, -179], [-89, 179], [89, 179], [89, -179]]))
+    index.add(Geofence("stadium", "exclusion", square(BASE_LAT + 0.01, BASE_LNG)))
+    rng = np.random.default_rng(0)
+    lat = BASE_LAT + rng.uniform(-10, 10, 10000)
+    lng = BASE_LNG + rng.uniform(-10, 10, 10000)
+    assert index.breaches(lat, lng).shape == (10000,)
+    assert index._zone_cells["province"] is None
+    assert index._zone_cells["world"] is None
+    assert len(index._cells) == len(index._zone_cells["stadium"]) <= 4
+
+    index.remove("world")
+    breach = index.breaches([BASE_LAT, BASE_LAT + 0.01, BASE_LAT + 6], [BASE_LNG, BASE_LNG, BASE_LNG])
+    assert breach.tolist() == [False, True, True]
+    index.remove("stadium")
+    assert index.breaches([BASE_LAT + 0.01], [BASE_LNG]).tolist() == [False]
+
+def test_exclusion_zone_breach_triggers_failsafe():
+    reset()
+    no_fly_lat, no_fly_lng = BASE_LAT + 0.005, BASE_LNG
+    requests.post(f"{API_URL}/geofences", json={
+        "name": "no_fly", "kind": "exclusion", "points": square(no_fly_lat, no_fly_lng),
+    })
+    try:
+        fly_mission([
+            {"name": "WP1", "lat": BASE_LAT, "lng": BASE_LNG + 0.005},
+            {"name": "WP2", "lat": no_fly_lat, "lng": no_fly_lng},
+            {"name": "WP3", "lat": BASE_LAT, "lng": BASE_LNG - 0.005},
+        ])
+
+        step()
+        assert get_status()["state"] == "flying"
+
+        step()
+        status = get_status()
+        assert status["state"] == "landing"
+        assert status["flight_mode"] == "FAILSAFE"
+        assert status["current_wp_index"] is None
+        assert (status["lat"], status["lng"]) == (no_fly_lat, no_fly_lng)
+    finally:
+        reset()
+
+def test_leaving_inclusion_zone_triggers_failsafe():
+    reset()
+    requests.post(f"{API_URL}/geofences", json={
+        "name": "field", "kind": "inclusion", "points": square(BASE_LAT, BASE_LNG, 0.003),
+    })
+    try:
+        fly_mission([
+            {"name": "WP1", "lat": BASE_LAT + 0.001, "lng": BASE_LNG},
+            {"name": "WP2", "lat": BASE_LAT + 0.006, "lng": BASE_LNG},
+            {"name": "WP3", "lat": BASE_LAT, "lng": BASE_LNG},
+        ])
+
+        step()
+        assert get_status()["state"] == "flying"
+
+        step()
+        assert get_status()["flight_mode"] == "FAILSAFE"
+    finally:
+        reset()
@@ -0,0 +1,99 @@
+import io
+import json
+import re
+
+import requests
+
+import logs
+from metrics import Registry
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/fleet", json={"size": 1})
+    requests.post(f"{API_URL}/reset")
+
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
+def scrape(name, **labels):
+    """Value of one sample from /api/metrics, 0 if it is not there yet."""
+    text = requests.get(f"{API_URL}/metrics").text
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match and match[1] == name and dict(re.findall(r'(\w+)="([^"]*)"', match[2] or "")) == labels:
+            return float(match[3])
+    return 0
+
+def test_metrics_endpoint_serves_prometheus_text():
+    res = requests.get(f"{API_URL}/metrics")
+    assert res.status_code == 200
+    assert res.headers["Content-Type"].startswith("text/plain")
+    assert "# TYPE gcs_tick_duration_seconds histogram" in res.text
+
+def test_ticks_are_timed():
+    before = scrape("gcs_tick_duration_seconds_count")
+    step(3)
+    assert scrape("gcs_tick_duration_seconds_count") == before + 3
+    assert scrape("gcs_sim_ticks") >= 3
+
+def test_requests_are_counted_per_route():
+    labels = {"route": "/api/status", "method": "GET", "status": "200"}
+    before = scrape("gcs_http_requests_total", **labels)
+    requests.get(f"{API_URL}/status")
+    requests.get(f"{API_URL}/status")
+    assert scrape("gcs_http_requests_total", **labels) == before + 2
+
+def test_failsafe_and_injections_are_counted():
+    reset()
+    failsafes = scrape("gcs_transitions_total", event="failsafe")
+    injections = scrape("gcs_failure_injections_total", mode="low_battery")
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+    requests.post(f"{API_URL}/inject_failure", json={"mode": "low_battery"})
+    step()
+    assert scrape("gcs_failure_injections_total", mode="low_battery") == injections + 1
+    assert scrape("gcs_transitions_total", event="failsafe") == failsafes + 1
+
+def test_rolled_back_batches_are_not_counted_as_accepted():
+    reset()
+    injections = scrape("gcs_failure_injections_total", mode="low_battery")
+    accepted = scrape("gcs_commands_total", command="inject_failure", result="ok")
+    rolled_back = scrape("gcs_commands_total", command="inject_failure", result="rolled_back")
+    requests.post(f"{API_URL}/batch", json={"commands": [
+        {"command": "inject_failure", "mode": "low_battery"},
+        {"command": "takeoff"},  # rejected: not armed
+    ]})
+    assert scrape("gcs_failure_injections_total", mode="low_battery") == injections
+    assert scrape("gcs_commands_total", command="inject_failure", result="ok") == accepted
+    assert scrape("gcs_commands_total", command="inject_failure", result="rolled_back") == rolled_back + 1
+    requests.post(f"{API_URL}/inject_failure", json={"mode": "reset"})
+
+def test_fleet_state_gauge():
+    reset()
+    requests.post(f"{API_URL}/arm")
+    assert scrape("gcs_drones", state="armed") == 1
+    assert scrape("gcs_drones", state="disarmed") == 0
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "test", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        latency.observe(value)
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+
+def test_logs_are_rate_limited_json():
+    stream = io.StringIO()
+    logger = logs.configure(level="INFO", interval=60, burst=2, stream=stream)
+    try:
+        for i in range(5):
+            logger.info("failsafe", extra={"fields": {"drone": i}})
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [entry["drone"] for entry in lines] == [0, 1]
+        assert lines[0]["event"] == "failsafe" and lines[0]["level"] == "INFO"
+    finally:
+        logs.configure()
@@ -1,11 +1,14 @@
 import requests
-import time
+from math import radians, cos, sin, asin, sqrt
 
 API_URL = "http://localhost:5000/api"
 
 def reset():
     requests.post(f"{API_URL}/reset")
 
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
 def test_upload_valid_mission():
     reset()
     res = requests.post(f"{API_URL}/mission", json={"waypoints": ["WP1", "WP2", "WP3"]})
@@ -43,7 +46,7 @@ def test_waypoint_progression():
     requests.post(f"{API_URL}/takeoff")
 
     # Wait for progression
-    time.sleep(12)  # Wait enough time to step through 2+ waypoints
+    step(2)  # Step through 2+ waypoints
 
     res = requests.get(f"{API_URL}/status")
     data = res.json()
@@ -57,8 +60,46 @@ def test_final_waypoint_triggers_landing():
     requests.post(f"{API_URL}/takeoff")
 
     # Wait long enough to complete mission
-    time.sleep(15)
+    step(3)
 
     res = requests.get(f"{API_URL}/status")
     data = res.json()
     assert data["state"] in ["landing", "disarmed"]
+
+def distance_km(lat1, lng1, lat2, lng2):
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * 6371 * asin(sqrt(a))
+
+def test_generated_waypoints_inside_geofence():
+    reset()
+    waypoints = [f"WP{i}" for i in range(2000)]
+    res = requests.post(f"{API_URL}/mission", json={"waypoints": waypoints})
+    assert res.status_code == 200
+    mission = res.json()["mission"]
+    assert [wp["name"] for wp in mission] == waypoints
+    assert all(distance_km(51.0447, -114.0719, wp["lat"], wp["lng"]) <= 2 for wp in mission)
+
+def test_seeded_mission_is_reproducible():
+    reset()
+    body = {"waypoints": ["WP1", "WP2", "WP3"], "seed": 42}
+    first = requests.post(f"{API_URL}/mission", json=body).json()["mission"]
+    second = requests.post(f"{API_URL}/mission", json=body).json()["mission"]
+    assert first == second
+
+def test_upload_mission_with_fixed_coordinates():
+    reset()
+    waypoints = [{"name": "HOME", "lat": 51.0447, "lng": -114.0719}, "WP2"]
+    res = requests.post(f"{API_URL}/mission", json={"waypoints": waypoints})
+    assert res.status_code == 200
+    mission = res.json()["mission"]
+    assert mission[0] == {"name": "HOME", "lat": 51.0447, "lng": -114.0719}
+    assert mission[1]["name"] == "WP2"
+
+def test_upload_mission_outside_geofence():
+    reset()
+    waypoints = ["WP1", {"name": "FAR", "lat": 51.2, "lng": -114.0719}]
+    res = requests.post(f"{API_URL}/mission", json={"waypoints": waypoints})
+    assert res.status_code == 400
+    assert "FAR" in res.json()["message"]
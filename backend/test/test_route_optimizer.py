@@ -0,0 +1,104 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import requests
+
+from commands import COMMANDS, estimate_flight
+from fleet import DISARMED, Fleet
+from geo import distance_matrix_km, haversine_km, sample_in_radius
+from route_optimizer import nearest_neighbour_path, optimize_route, path_length_km
+
+API_URL = "http://localhost:5000/api"
+HOME = (51.0447, -114.0719)
+
+def points(n, seed=0):
+    return sample_in_radius(n, *HOME, 2, np.random.default_rng(seed))
+
+def test_distance_matrix_matches_haversine():
+    lat, lng = points(300)
+    expected = haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+    np.testing.assert_allclose(distance_matrix_km(lat, lng), expected, atol=1e-6)
+
+@pytest.mark.parametrize("start", [HOME, None])
+def test_small_routes_are_near_optimal(start):
+    for seed in range(10):
+        lat, lng = points(7, seed)
+        best = min(path_length_km(lat[list(p)], lng[list(p)], start) for p in itertools.permutations(range(7)))
+        order = optimize_route(lat, lng, start)
+        assert sorted(order.tolist()) == list(range(7))
+        assert path_length_km(lat[order], lng[order], start) <= best * 1.1
+
+def test_large_route_improves_on_nearest_neighbour():
+    lat, lng = points(2000)
+    start = np.concatenate([[HOME[0]], lat]), np.concatenate([[HOME[1]], lng])
+    greedy = nearest_neighbour_path(distance_matrix_km(*start))[1:] - 1
+    order = optimize_route(lat, lng, HOME, time_budget=5)
+    assert sorted(order.tolist()) == list(range(2000))
+    assert path_length_km(lat[order], lng[order], HOME) < 0.95 * path_length_km(lat[greedy], lng[greedy], HOME)
+
+def test_upload_optimized_mission():
+    requests.post(f"{API_URL}/reset")
+    waypoints = [f"WP{i}" for i in range(200)]
+    plain = requests.post(f"{API_URL}/mission", json={"waypoints": waypoints, "seed": 4}).json()
+    res = requests.post(f"{API_URL}/mission", json={"waypoints": waypoints, "seed": 4, "optimize": True})
+    assert res.status_code == 200
+    route = res.json()["route"]
+    assert route["optimized"] is True
+    assert route["original_length_km"] == pytest.approx(plain["route"]["length_km"])
+    assert route["length_km"] < route["original_length_km"] / 3
+    # The simulator flies one waypoint per tick, so the order does not change the estimate
+    assert route["estimated_flight_ticks"] == plain["route"]["estimated_flight_ticks"] == 224
+    assert route["battery_sufficient"] is False
+    assert sorted(wp["name"] for wp in res.json()["mission"]) == sorted(waypoints)
+
+@pytest.mark.parametrize("waypoints", [1, 20, 70])
+def test_flight_estimate_matches_simulation(waypoints):
+    fleet = Fleet(1, home=HOME)
+    COMMANDS["mission"](fleet, 0, {"waypoints": [f"WP{i}" for i in range(waypoints)], "seed": 1})
+    COMMANDS["arm"](fleet, 0)
+    COMMANDS["takeoff"](fleet, 0)
+    ticks = 0
+    while fleet.state[0] != DISARMED:
+        fleet.tick()
+        ticks += 1
+    estimate = estimate_flight(waypoints)
+    assert estimate["estimated_flight_ticks"] == ticks
+    assert estimate["estimated_battery_pct"] == 100 - fleet.battery[0]
+    assert estimate["battery_sufficient"]
+
+def test_upload_rejects_invalid_time_budget():
+    requests.post(f"{API_URL}/reset")
+    res = requests.post(f"{API_URL}/mission", json={"waypoints": ["WP1"], "optimize": True, "time_budget": 0})
+    assert res.status_code == 400
+
+def test_optimizing_upload_does_not_hold_up_ticks(monkeypatch):
+    import app as sim
+    import commands
+
+    client = sim.app.test_client()
+    client.post("/api/reset")
+    optimizing, release = threading.Event(), threading.Event()
+
+    def blocked_optimize(*args, **kwargs):
+        optimizing.set()
+        release.wait()
+        return optimize_route(*args, **kwargs)
+
+    monkeypatch.setattr(commands, "optimize_route", blocked_optimize)
+    body = {"waypoints": [f"WP{i}" for i in range(50)], "seed": 1, "optimize": True}
+    with ThreadPoolExecutor(2) as pool:
+        upload = pool.submit(sim.app.test_client().post, "/api/mission", json=body)
+        try:
+            assert optimizing.wait(10)
+            ticks = sim.clock.ticks
+            # Fails with a timeout rather than deadlocking if the upload held the lock
+            assert pool.submit(client.post, "/api/sim/step").result(10).status_code == 200
+            assert sim.clock.ticks == ticks + 1
+            assert not upload.done()
+        finally:
+            release.set()
+        assert upload.result().status_code == 200
+    client.post("/api/clear_mission")
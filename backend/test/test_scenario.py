@@ -0,0 +1,44 @@
+import pytest
+
+from scenario import load_spec, run_scenario
+
+SPEC = {
+    "runs": 3000,
+    "chunk_size": 1000,
+    "seed": 5,
+    "mission_length": [1, 30],
+    "inject_tick": [1, 30],
+    "failures": {"low_battery": 1, "motor_fail": 1, "none": 1},
+}
+
+def final_report(spec, workers=1):
+    reports = list(run_scenario(spec, workers))
+    assert [r["done"] for r in reports] == [False] * (len(reports) - 1) + [True]
+    return reports[-1]
+
+def test_every_run_gets_one_outcome():
+    report = final_report(SPEC)
+    assert report["runs"] == 3000
+    assert sum(sum(counts.values()) for counts in report["outcomes"].values()) == 3000
+    assert sum(report["disarm_tick"]) == 3000 - sum(c["timeout"] for c in report["outcomes"].values())
+
+def test_results_do_not_depend_on_worker_count():
+    assert final_report(SPEC, workers=1) == final_report(SPEC, workers=2)
+
+def test_uneventful_missions_land_on_schedule():
+    report = final_report({"runs": 50, "mission_length": [3, 3], "failures": {"none": 1}})
+    assert report["safe_rate"]["none"] == 1
+    assert report["landing_causes"]["none"]["mission_complete"] == 50
+    # 3 ticks to the last waypoint at 16 m, then 4 ticks descending at 5 m/tick
+    assert report["disarm_tick"][7] == 50
+
+def test_low_battery_while_high_is_unsafe():
+    report = final_report({"runs": 50, "mission_length": [60, 60], "inject_tick": [50, 50], "failures": {"low_battery": 1}})
+    assert report["outcomes"]["low_battery"]["battery_exhausted"] == 50
+    assert report["landing_causes"]["low_battery"]["failsafe"] == 50
+
+def test_invalid_spec():
+    with pytest.raises(ValueError):
+        load_spec({"failures": {"engine_fire": 1}})
+    with pytest.raises(ValueError):
+        load_spec({"mission_length": [10, 2]})
@@ -0,0 +1,111 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+from commands import COMMANDS
+from fleet import Fleet
+from shared_state import DroneRecordView, SharedFleet
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = (51.0447, -114.0719)
+
+@pytest.fixture
+def shared():
+    segment = SharedFleet.create(capacity=4)
+    yield segment
+    segment.close()
+    segment.shm.unlink()
+
+def flying_fleet(size):
+    fleet = Fleet(size, home=HOME)
+    COMMANDS["mission"](fleet, 1, {"waypoints": ["WP1", "WP2"], "seed": 3})
+    COMMANDS["arm"](fleet, 1, {})
+    COMMANDS["takeoff"](fleet, 1, {})
+    fleet.tick()
+    return fleet
+
+def test_published_drones_read_back_like_the_fleet(shared):
+    fleet = flying_fleet(3)
+    shared.publish(fleet.snapshot(), 7, 35.0)
+
+    size, ticks, record = shared.read_drone(1)
+    assert (size, ticks) == (3, 7)
+    assert int(record["version"][0]) == fleet.version[1]
+    assert DroneRecordView(record, fleet.missions[1]).to_dict(0) == fleet.to_dict(1)
+    assert shared.read_drone(3)[2] is None
+
+def test_only_changed_drones_are_rewritten(shared):
+    fleet = flying_fleet(3)
+    shared.publish(fleet.snapshot(), 1, 5.0)
+    shared.drones["battery"][0] = -1  # would be overwritten by a full rewrite
+    fleet.tick()
+    shared.publish(fleet.snapshot(), 2, 10.0)
+    assert shared.drones["battery"][0] == -1
+    record = shared.read_drone(1)[2]
+    assert DroneRecordView(record, fleet.missions[1]).to_dict(0) == fleet.to_dict(1)
+
+def test_drones_beyond_capacity_are_not_mirrored(shared):
+    shared.publish(Fleet(6, home=HOME).snapshot(), 0, 0.0)
+    size, _, record = shared.read_drone(5)
+    assert size == 4
+    assert record is None
+
+def test_reader_waits_for_write_in_progress(shared):
+    shared.publish(Fleet(1, home=HOME).snapshot(), 1, 5.0)
+    shared.header["seq"] += 1  # a writer stalled mid-update
+
+    def finish_write():
+        time.sleep(0.05)
+        shared.header["ticks"] = 2
+        shared.header["seq"] += 1
+
+    writer = threading.Thread(target=finish_write)
+    writer.start()
+    _, ticks, _ = shared.read_drone(0)
+    writer.join()
+    assert ticks == 2
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_workers_serve_status_and_forward_commands():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api"
+    env = {**os.environ, "SIM_CLOCK_MODE": "manual", "LOG_LEVEL": "WARNING"}
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", "2", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                requests.get(f"{url}/status", timeout=1)
+                break
+            except requests.ConnectionError:
+                assert time.monotonic() < deadline, "server did not start"
+                time.sleep(0.1)
+
+        assert requests.post(f"{url}/arm").status_code == 200
+        assert requests.post(f"{url}/takeoff").status_code == 200
+        requests.post(f"{url}/mission", json={"waypoints": ["WP1", "WP2"], "seed": 1})
+        requests.post(f"{url}/sim/step", json={"ticks": 2})
+
+        res = requests.get(f"{url}/status")
+        status = res.json()
+        assert status["state"] == "flying"
+        assert status["altitude"] == 14
+        assert [wp["name"] for wp in status["mission"]] == ["WP1", "WP2"]
+        assert requests.get(f"{url}/status", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+        assert requests.get(f"{url}/drones/9/status").status_code == 404
+    finally:
+        server.terminate()
+        server.wait(10)
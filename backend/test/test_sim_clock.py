@@ -0,0 +1,63 @@
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/reset")
+
+def get_status():
+    return requests.get(f"{API_URL}/status").json()
+
+def test_step_advances_clock():
+    before = requests.get(f"{API_URL}/sim/clock").json()
+    res = requests.post(f"{API_URL}/sim/step", json={"ticks": 3})
+    assert res.status_code == 200
+    clock = res.json()["clock"]
+    assert clock["ticks"] == before["ticks"] + 3
+    assert clock["sim_time"] == before["sim_time"] + 3 * clock["tick_period"]
+
+def test_changing_tick_period_keeps_past_sim_time():
+    before = requests.get(f"{API_URL}/sim/clock").json()
+    requests.post(f"{API_URL}/sim/step", json={"ticks": 2})
+    try:
+        requests.post(f"{API_URL}/sim/clock", json={"tick_period": 1})
+        clock = requests.post(f"{API_URL}/sim/step", json={"ticks": 3}).json()["clock"]
+    finally:
+        requests.post(f"{API_URL}/sim/clock", json={"tick_period": before["tick_period"]})
+    assert clock["sim_time"] == before["sim_time"] + 2 * before["tick_period"] + 3
+    history = requests.get(f"{API_URL}/telemetry/history", params={"from": before["sim_time"] + 1}).json()
+    assert history["timestamps"][-5:] == sorted(history["timestamps"][-5:])
+    assert len(history["timestamps"]) == 5
+
+def test_step_rejects_invalid_ticks():
+    res = requests.post(f"{API_URL}/sim/step", json={"ticks": 0})
+    assert res.status_code == 400
+
+def test_invalid_clock_mode():
+    res = requests.post(f"{API_URL}/sim/clock", json={"mode": "warp"})
+    assert res.status_code == 400
+    assert requests.get(f"{API_URL}/sim/clock").json()["mode"] == "manual"
+
+def test_step_requires_manual_mode():
+    requests.post(f"{API_URL}/sim/clock", json={"mode": "accelerated", "speed": 0.001})
+    try:
+        res = requests.post(f"{API_URL}/sim/step", json={"ticks": 1})
+        assert res.status_code == 400
+        assert "manual" in res.json()["message"].lower()
+    finally:
+        requests.post(f"{API_URL}/sim/clock", json={"mode": "manual"})
+
+def test_stepped_flight_is_deterministic():
+    results = []
+    for _ in range(2):
+        reset()
+        requests.post(f"{API_URL}/arm")
+        requests.post(f"{API_URL}/takeoff")
+        requests.post(f"{API_URL}/sim/step", json={"ticks": 5})
+        requests.post(f"{API_URL}/inject_failure", json={"mode": "low_battery"})
+        requests.post(f"{API_URL}/sim/step", json={"ticks": 10})
+        results.append(get_status())
+
+    assert results[0] == results[1]
+    assert results[0]["state"] == "disarmed"
+    assert results[0]["battery"] == 0
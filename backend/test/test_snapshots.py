@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import requests
+
+from fleet import Fleet, FLYING, MIN_POOL_CAPACITY
+
+API_URL = "http://localhost:5000/api"
+
+def test_snapshot_is_isolated_from_later_writes():
+    fleet = Fleet(3)
+    snapshot = fleet.snapshot()
+    fleet.state[1] = FLYING
+    fleet.touch(1)
+    fleet.resize(5)
+    assert snapshot.size == 3
+    assert snapshot.to_dict(1)["state"] == "disarmed"
+    assert snapshot.counts()["disarmed"] == 3
+    assert snapshot.version[1] != fleet.version[1]
+
+def test_snapshot_is_read_only():
+    snapshot = Fleet(2).snapshot()
+    with pytest.raises(ValueError):
+        snapshot.battery[0] = 0
+    assert np.array_equal(snapshot.battery, [100, 100])
+
+def test_snapshot_shares_columns_no_drone_changed():
+    fleet = Fleet(4)
+    previous = fleet.snapshot()
+    fleet.state[2] = FLYING
+    fleet.touch(2)
+    snapshot = fleet.snapshot(previous)
+    assert snapshot.battery is previous.battery
+    assert snapshot.missions is previous.missions
+    assert snapshot.state is not previous.state
+    assert snapshot.to_dict(2)["state"] == "flying"
+    assert previous.to_dict(2)["state"] == "disarmed"
+
+def test_incremental_snapshot_matches_a_full_copy():
+    fleet = Fleet(3, home=(51.0447, -114.0719))
+    for i in (0, 2):
+        fleet.set_mission(i, [{"name": "WP", "lat": 51.05 + i / 1000, "lng": -114.07}] * 10)
+        fleet.touch(i)
+    previous = fleet.snapshot()
+    checkpoint = fleet.checkpoint()
+    for _ in range(MIN_POOL_CAPACITY // 10):  # enough missions to compact the pool
+        fleet.set_mission(1, [{"name": "WP", "lat": 51.04, "lng": -114.07}] * 10)
+        fleet.touch(1)
+        previous = fleet.snapshot(previous)
+        assert np.array_equal(previous.mission_coords(2), fleet.mission_coords(2))
+    fleet.restore(checkpoint)  # versions roll back too
+    view = fleet.snapshot(previous)
+    assert [view.to_dict(i) for i in range(3)] == [fleet.to_dict(i) for i in range(3)]
+    assert np.array_equal(view.mission_coords(2), fleet.mission_coords(2))
+
+def test_concurrent_status_reads_are_consistent():
+    requests.post(f"{API_URL}/fleet", json={"size": 1})
+    requests.post(f"{API_URL}/reset")
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+
+    def read(_):
+        res = requests.get(f"{API_URL}/status")
+        return res.headers["ETag"], res.content
+
+    with ThreadPoolExecutor(8) as pool:
+        reads = pool.map(read, range(200))
+        for _ in range(20):
+            requests.post(f"{API_URL}/sim/step")
+        bodies = {}
+        for etag, body in reads:
+            # A version is only ever served with one body
+            assert bodies.setdefault(etag, body) == body
+    requests.post(f"{API_URL}/reset")
+
+def test_each_tick_is_published_once():
+    import app as sim
+
+    client = sim.app.test_client()
+    published = []
+
+    def listener(view):
+        published.append(sim.clock.ticks)
+
+    sim.snapshot_listeners.append(listener)
+    try:
+        before = sim.clock.ticks
+        client.post("/api/sim/step", json={"ticks": 3})
+        client.post("/api/arm", json={})
+        client.post("/api/takeoff", json={})
+        client.post("/api/takeoff", json={})  # rejected, nothing changes
+    finally:
+        sim.snapshot_listeners.remove(listener)
+        client.post("/api/reset")
+    # Listeners see each tick's snapshot with its tick count, and one per accepted command
+    assert published == [before + 1, before + 2, before + 3, before + 3, before + 3]
@@ -1,11 +1,13 @@
 import requests
-import time
 
 API_URL = "http://localhost:5000/api"
 
 def reset():
     requests.post(f"{API_URL}/reset")
 
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
 def get_status():
     return requests.get(f"{API_URL}/status").json()
 
@@ -19,14 +21,13 @@ def test_arm_takeoff_land_arm_again():
     reset()
     assert requests.post(f"{API_URL}/arm").status_code == 200
     assert requests.post(f"{API_URL}/takeoff").status_code == 200
-    time.sleep(1)
     assert requests.post(f"{API_URL}/land").status_code == 200
 
     # Wait until drone is disarmed
-    for i in range(12):  # up to 60s
-        time.sleep(5)
+    for i in range(12):  # up to 12 ticks
+        step()
         status = get_status()
-        print(f"[WAIT] {i*5}s → Alt={status['altitude']}, State={status['state']}, Armed={status['armed']}")
+        print(f"[WAIT] tick {i + 1} → Alt={status['altitude']}, State={status['state']}, Armed={status['armed']}")
         if status["state"] == "disarmed":
             break
     else:
@@ -0,0 +1,60 @@
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/reset")
+
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
+def test_status_returns_etag():
+    reset()
+    res = requests.get(f"{API_URL}/status")
+    assert res.status_code == 200
+    assert res.headers["ETag"]
+
+def test_unchanged_status_is_not_modified():
+    reset()
+    etag = requests.get(f"{API_URL}/status").headers["ETag"]
+    step()  # a disarmed drone does not change on a tick
+    res = requests.get(f"{API_URL}/status", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert not res.content
+
+def test_commands_change_etag():
+    reset()
+    etag = requests.get(f"{API_URL}/status").headers["ETag"]
+    requests.post(f"{API_URL}/arm")
+    res = requests.get(f"{API_URL}/status", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.json()["state"] == "armed"
+
+def test_tick_changes_etag_of_active_drone():
+    reset()
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+    etag = requests.get(f"{API_URL}/status").headers["ETag"]
+    step()
+    res = requests.get(f"{API_URL}/status", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+def test_reset_changes_etag():
+    reset()
+    etag = requests.get(f"{API_URL}/status").headers["ETag"]
+    reset()
+    res = requests.get(f"{API_URL}/status", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+def test_fields_projection():
+    reset()
+    res = requests.get(f"{API_URL}/status", params={"fields": "state,battery"})
+    assert res.status_code == 200
+    assert res.json() == {"state": "disarmed", "battery": 100}
+    assert res.headers["ETag"] != requests.get(f"{API_URL}/status").headers["ETag"]
+
+def test_unknown_field_projection():
+    res = requests.get(f"{API_URL}/status", params={"fields": "state,speed"})
+    assert res.status_code == 400
+    assert "speed" in res.json()["message"]
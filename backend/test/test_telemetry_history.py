@@ -0,0 +1,57 @@
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/reset")
+
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
+def sim_time():
+    return requests.get(f"{API_URL}/sim/clock").json()["sim_time"]
+
+def test_history_records_every_tick():
+    reset()
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+    start = sim_time()
+    step(30)
+
+    res = requests.get(f"{API_URL}/telemetry/history", params={"from": start + 1})
+    assert res.status_code == 200
+    data = res.json()
+    assert data["returned"] == 30
+    assert data["timestamps"] == sorted(data["timestamps"])
+    assert data["altitude"][:3] == [12, 14, 16]
+    assert data["state"][0] == "flying"
+
+def test_history_is_downsampled():
+    reset()
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+    start = sim_time()
+    step(40)
+
+    for method in ("lttb", "minmax"):
+        res = requests.get(f"{API_URL}/telemetry/history", params={
+            "from": start + 1, "max_points": 10, "method": method,
+        })
+        assert res.status_code == 200
+        data = res.json()
+        assert 2 <= data["returned"] <= 10
+        assert data["timestamps"][0] == start + 5
+        assert data["timestamps"][-1] == sim_time()
+
+def test_history_time_range():
+    reset()
+    step(5)
+    end = sim_time()
+    data = requests.get(f"{API_URL}/telemetry/history", params={"from": end - 10, "to": end}).json()
+    assert data["timestamps"] == [end - 10, end - 5, end]
+
+def test_history_invalid_query():
+    res = requests.get(f"{API_URL}/telemetry/history", params={"max_points": 1})
+    assert res.status_code == 400
+    res = requests.get(f"{API_URL}/telemetry/history", params={"method": "average"})
+    assert res.status_code == 400
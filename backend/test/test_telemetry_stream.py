@@ -0,0 +1,40 @@
+import json
+import requests
+
+API_URL = "http://localhost:5000/api"
+
+def reset():
+    requests.post(f"{API_URL}/reset")
+
+def step(ticks=1):
+    requests.post(f"{API_URL}/sim/step", json={"ticks": ticks})
+
+def read_events(res):
+    event = None
+    for line in res.iter_lines(chunk_size=1, decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+def test_stream_starts_with_snapshot():
+    reset()
+    with requests.get(f"{API_URL}/stream", stream=True, timeout=5) as res:
+        assert res.headers["Content-Type"].startswith("text/event-stream")
+        event, data = next(read_events(res))
+        assert event == "snapshot"
+        assert data == requests.get(f"{API_URL}/status").json()
+
+def test_stream_sends_only_changed_fields():
+    reset()
+    requests.post(f"{API_URL}/arm")
+    requests.post(f"{API_URL}/takeoff")
+    with requests.get(f"{API_URL}/stream", stream=True, timeout=5) as res:
+        events = read_events(res)
+        event, snapshot = next(events)
+        assert event == "snapshot"
+
+        step()
+        event, delta = next(events)
+        assert event == "delta"
+        assert delta == {"battery": snapshot["battery"] - 1, "altitude": snapshot["altitude"] + 2}
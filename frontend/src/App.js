@@ -12,10 +12,15 @@ function App() {
   const [log, setLog] = useState([]);
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetchStatus();
-    }, 5000);
-    return () => clearInterval(interval);
+    // Server pushes a full snapshot on connect and per-tick deltas afterwards
+    const source = new EventSource(`${API_URL}/stream`);
+    source.addEventListener("snapshot", (e) => setStatus(JSON.parse(e.data)));
+    source.addEventListener("delta", (e) => {
+      const delta = JSON.parse(e.data);
+      setStatus((prev) => ({ ...prev, ...delta }));
+    });
+    source.onerror = () => logAction("Telemetry stream interrupted, reconnecting");
+    return () => source.close();
   }, []);
 
   const logAction = (action) => {